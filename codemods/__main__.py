@@ -0,0 +1,3 @@
+from codemods.runner import main
+
+raise SystemExit(main())
@@ -0,0 +1,436 @@
+"""Benchmarks for the codemod transforms over synthetic group-screen.tsx corpora.
+
+Usage: python -m codemods.bench [--sizes 10k,1m,50m] [--engines ...] [--history PATH]
+
+Every (engine, size) case runs in a fresh spawned process so peak RSS is
+per case. Peak traced memory (the most tracemalloc saw held at once, not a
+sum of allocations) is measured in a separate pass so it does not skew the
+timings. Results are appended to a JSON history file and compared with the
+previous entry for the same case.
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+import tracemalloc
+from pathlib import Path
+from queue import Empty
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from codemods.engine import Rewrite, stream_rewrite
+from codemods.template import compile_template, load_template
+from codemods.transforms import TRANSFORMS
+from codemods.transforms.group_screen import SLOTS
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_HISTORY = ROOT / '.codemod-bench.json'
+DEFAULT_SIZES = '10k,100k,1m,10m,50m'
+DEFAULT_ENGINES = 'legacy-transform,legacy-component,group-screen,group-component,import-strip,import-strip-stream'
+REGRESSION_RATIO = 1.25
+CASE_TIMEOUT = 1800.0
+POLL_INTERVAL = 0.5
+
+# Literal blocks and flow of the original transform_group_screen.py / rewrite_group_component.py.
+LEGACY_IMPORT = "import { useConveyor } from '@/app/hooks/use-conveyor'\n"
+LEGACY_KEY_BLOCK = (
+    '  const keyBadgeClass = isCompact\n'
+    "    ? 'absolute -bottom-1.5 left-1/2 -translate-x-1/2 rounded-full border border-slate-700 bg-slate-900 px-1.5 text-[9px] tracking-widest text-slate-200'\n"
+    "    : 'absolute -bottom-2 left-1/2 -translate-x-1/2 rounded-full border border-slate-700 bg-slate-900 px-2 text-[10px] tracking-widest text-slate-200'\n"
+    '\n'
+)
+LEGACY_KEY_BADGE = '      {member.keyBinding && <span className={keyBadgeClass}>{member.keyBinding.toUpperCase()}</span>}\n'
+LEGACY_INTERFACE = (
+    'interface CompactGroupOverlayProps {\n'
+    '  role: GroupRole\n'
+    '  members: MemberSnapshot[]\n'
+    '  me?: MemberSnapshot\n'
+    '  nextCaster?: MemberSnapshot\n'
+    '  tick: number\n'
+    '  profileKeyBinding: string | null\n'
+    '  isBinding: boolean\n'
+    '  onBind: () => void\n'
+    '  onCast: () => void\n'
+    '  onReset: () => void\n'
+    '  onBack: () => void\n'
+    '}\n'
+    '\n'
+)
+
+SKELETON_HEAD = compile_template(
+    """import { useEffect, useMemo, useRef, useState, type ReactNode } from 'react'
+import { Button } from '@/app/components/ui/button'
+import { GROUP_ROLES, ROLE_CONFIG } from '@/app/constants/battle'
+import { useBattleContext } from '@/app/providers/battle-provider'
+import type { GroupRole, MemberSnapshot, Role } from '@/app/types/battle'
+import { cn } from '@/lib/utils'
+import { now as timeNow } from '@/app/utils/time'
+import { useMediaQuery } from '@/app/hooks/use-media-query'
+@{import_line}
+const GROUP_LABELS: Record<GroupRole, string> = {
+  healer: '治疗',
+  blade: '陌刀',
+  fan: '扇子',
+}
+
+const COMPACT_MEDIA_QUERY = '(max-width: 120px)'
+const NEXT_TURN_AUDIO_SRC = new URL('../../../voice/语音播报.mp3', import.meta.url).href
+
+const isGroupRole = (role: Role | null): role is GroupRole => !!role && GROUP_ROLES.includes(role as GroupRole)
+
+const SkillIcon = ({ member, isCompact }: { member: MemberSnapshot; isCompact: boolean }) => {
+  const nextBadgeClass = isCompact ? 'absolute -top-1 left-1/2' : 'absolute -top-2 left-1/2'
+@{key_block}  return (
+    <div className="relative shrink-0 border border-slate-800 bg-slate-950">
+      <span className={nextBadgeClass}>NEXT</span>
+@{key_badge}    </div>
+  )
+}
+
+""",
+    'bench-skeleton',
+)
+
+FILLER_INTERFACE = """interface Filler{index}Props {{
+  id: string
+  value: number
+  tone?: 'default' | 'danger'
+  onSelect: (id: string) => void
+}}
+
+"""
+
+FILLER_COMPONENT = """const Filler{index} = ({{ id, value, tone = 'default', onSelect }}: {props}) => {{
+  const label = useMemo(() => `${{id}} · ${{value}}`, [id, value])
+  return (
+    <button
+      type="button"
+      className={{cn('rounded-md border border-slate-800 px-2 py-1 text-xs', tone === 'danger' && 'text-rose-300')}}
+      onClick={{() => onSelect(id)}}
+    >
+{padding}      {{label}}
+    </button>
+  )
+}}
+
+"""
+
+FILLER_PADDING = '      <span className="sr-only">{index}-{line}</span>\n'
+INLINE_PROPS = "{ id: string; value: number; tone?: 'default' | 'danger'; onSelect: (id: string) => void }"
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower()
+    units = {'k': 1024, 'm': 1024 * 1024, 'g': 1024 * 1024 * 1024}
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+def format_size(size: int) -> str:
+    for unit, scale in (('GB', 1024 ** 3), ('MB', 1024 ** 2), ('KB', 1024)):
+        if size >= scale:
+            return f'{size / scale:g}{unit}'
+    return f'{size}B'
+
+
+def generate_corpus(size: int, components: int | None = None, interfaces: int | None = None, match_sites: int = 1, seed: int = 0) -> str:
+    """Build a group-screen.tsx-shaped module of roughly `size` bytes.
+
+    The skeleton carries every pattern both legacy scripts and the current
+    transforms look for; filler components (and, for the first `interfaces`
+    of them, props interfaces) make up the rest. With a fixed component
+    count each component is padded with JSX lines to reach the size.
+    `match_sites` copies of the use-conveyor import are spread between them.
+    """
+    rng = random.Random(seed)
+    head = SKELETON_HEAD.render(import_line=LEGACY_IMPORT, key_block=LEGACY_KEY_BLOCK, key_badge=LEGACY_KEY_BADGE)
+    tail = (
+        LEGACY_INTERFACE
+        + load_template('compact-group-overlay.tsx.tmpl').render(**SLOTS)
+        + '\n'
+        + load_template('group-screen.tsx.tmpl').render(**SLOTS)
+    )
+    budget = max(0, size - len(head.encode('utf-8')) - len(tail.encode('utf-8')))
+
+    def filler(index: int, padding_lines: int) -> str:
+        with_interface = interfaces is None or index < interfaces
+        padding = ''.join(FILLER_PADDING.format(index=index, line=line) for line in range(padding_lines))
+        props = f'Filler{index}Props' if with_interface else INLINE_PROPS
+        block = FILLER_COMPONENT.format(index=index, props=props, padding=padding)
+        return (FILLER_INTERFACE.format(index=index) if with_interface else '') + block
+
+    parts = []
+    used = 0
+    if components is None:
+        index = 0
+        while used < budget:
+            block = filler(index, rng.randint(0, 4))
+            parts.append(block)
+            used += len(block.encode('utf-8'))
+            index += 1
+    else:
+        bare = sum(len(filler(index, 0).encode('utf-8')) for index in range(components))
+        per_line = len(FILLER_PADDING.format(index=components, line=0).encode('utf-8'))
+        padding_lines = max(0, (budget - bare) // max(1, components * per_line))
+        parts = [filler(index, padding_lines) for index in range(components)]
+
+    for site in range(1, match_sites):
+        parts.insert(rng.randint(0, len(parts)), LEGACY_IMPORT + '\n')
+    return head + ''.join(parts) + tail
+
+
+def legacy_transform(text: str) -> str:
+    new_interface = load_template('compact-group-overlay-props.tsx.tmpl').render(**SLOTS) + '\n'
+    new_compact = load_template('compact-group-overlay.tsx.tmpl').render(**SLOTS) + '\n'
+    new_group = load_template('group-screen.tsx.tmpl').render(**SLOTS)
+    text = text.replace(LEGACY_IMPORT, '')
+    text = text.replace(LEGACY_KEY_BLOCK, '')
+    text = text.replace(LEGACY_KEY_BADGE, '')
+    if LEGACY_INTERFACE not in text:
+        raise SystemExit('interface pattern not found')
+    text = text.replace(LEGACY_INTERFACE, new_interface)
+    old_compact_start = text.index('const CompactGroupOverlay = ({')
+    old_compact_end = text.index('export const GroupScreen = () => {')
+    text = text[:old_compact_start] + new_compact + text[old_compact_end:]
+    return new_compact + new_group
+
+
+def legacy_component(text: str) -> str:
+    source = '\n' + load_template('group-screen.tsx.tmpl').render(**SLOTS)
+    start = text.find('export const GroupScreen = () => {')
+    if start != -1:
+        text = textwrap.dedent(source)
+    return text
+
+
+def _in_memory(function):
+    def run(path: Path, text: str, scratch: Path):
+        return function(text)
+
+    return run
+
+
+# Bench-only literal rewrite (drop the use-conveyor import lines), run both in memory
+# and streamed to compare the two paths; it is not a transform the runner offers.
+IMPORT_STRIP = Rewrite()
+IMPORT_STRIP.replace('use-conveyor', LEGACY_IMPORT, '')
+
+
+def _streaming(rewrite: Rewrite):
+    def run(path: Path, text: str, scratch: Path):
+        return stream_rewrite(path, rewrite, target=scratch)
+
+    return run
+
+
+ENGINES = {
+    'legacy-transform': _in_memory(legacy_transform),
+    'legacy-component': _in_memory(legacy_component),
+    'group-screen': _in_memory(TRANSFORMS['group-screen'].transform),
+    'group-component': _in_memory(TRANSFORMS['group-component'].transform),
+    'import-strip': _in_memory(IMPORT_STRIP.apply),
+    'import-strip-stream': _streaming(IMPORT_STRIP),
+}
+STREAMING_ENGINES = {'import-strip-stream'}
+
+
+def _peak_rss() -> int | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _measure(engine: str, path: str, repeats: int, queue):
+    try:
+        queue.put(_measure_case(engine, Path(path), repeats))
+    except BaseException as error:
+        queue.put({'error': f'{type(error).__name__}: {error}'})
+        raise
+
+
+def _measure_case(engine: str, corpus: Path, repeats: int) -> dict:
+    scratch = corpus.with_suffix('.out')
+    run = ENGINES[engine]
+    text = None if engine in STREAMING_ENGINES else corpus.read_text(encoding='utf-8')
+    run(corpus, text, scratch)
+    rss_before = _peak_rss()
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run(corpus, text, scratch)
+        timings.append(time.perf_counter() - started)
+    rss_after = _peak_rss()
+
+    tracemalloc.start()
+    run(corpus, text, scratch)
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'timings': timings, 'rss_before': rss_before, 'peak_rss': rss_after, 'peak_traced': peak_traced}
+
+
+def _collect(process, queue, timeout: float) -> dict:
+    # Wait for the child's measurement, noticing when it dies (e.g. OOM-killed) or overruns.
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return queue.get(timeout=POLL_INTERVAL)
+        except Empty:
+            pass
+        if process.exitcode is not None:
+            try:
+                return queue.get(timeout=POLL_INTERVAL)  # it may have exited right after putting
+            except Empty:
+                return {'error': f'worker exited with code {process.exitcode} without a result'}
+        if time.monotonic() > deadline:
+            process.kill()
+            return {'error': f'timed out after {timeout:g}s'}
+
+
+def run_case(engine: str, corpus: Path, repeats: int, timeout: float = CASE_TIMEOUT) -> dict:
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_measure, args=(engine, str(corpus), repeats, queue))
+    process.start()
+    measured = _collect(process, queue, timeout)
+    process.join()
+    size = corpus.stat().st_size
+    if 'error' in measured:
+        return {'engine': engine, 'size': size, 'error': measured['error']}
+    megabytes = size / (1024 * 1024)
+    timings = measured['timings']
+    return {
+        'engine': engine,
+        'size': size,
+        'wall_min': min(timings),
+        'wall_median': statistics.median(timings),
+        'mb_per_s': megabytes / min(timings) if min(timings) else None,
+        'peak_rss': measured['peak_rss'],
+        'rss_growth': None if measured['peak_rss'] is None else measured['peak_rss'] - measured['rss_before'],
+        'peak_traced_per_mb': measured['peak_traced'] / megabytes if megabytes else None,
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        completed = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+def load_history(path: Path) -> list[dict]:
+    try:
+        history = json.loads(path.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return []
+    return history if isinstance(history, list) else []
+
+
+def find_regressions(history: list[dict], run: dict, ratio: float = REGRESSION_RATIO) -> list[str]:
+    previous = {}
+    for entry in history:
+        for result in entry['results']:
+            previous[(result['engine'], result['label'])] = result
+    regressions = []
+    for result in run['results']:
+        before = previous.get((result['engine'], result['label']))
+        if 'error' in result or not before or 'error' in before:
+            continue
+        if before['wall_min'] and result['wall_min'] > before['wall_min'] * ratio:
+            regressions.append(
+                f"{result['engine']} @ {result['label']}: {before['wall_min'] * 1000:.2f} ms -> {result['wall_min'] * 1000:.2f} ms"
+            )
+    return regressions
+
+
+def format_row(result: dict) -> str:
+    if 'error' in result:
+        return f"{result['engine']:<24} {result['label']:>7}  failed: {result['error']}"
+    rss = '-' if result['peak_rss'] is None else f"{result['peak_rss'] / (1024 * 1024):.1f} MB"
+    traced = '-' if result['peak_traced_per_mb'] is None else f"{result['peak_traced_per_mb'] / (1024 * 1024):.2f} MB/MB"
+    return (
+        f"{result['engine']:<24} {result['label']:>7} {result['wall_min'] * 1000:>10.2f} ms "
+        f"{result['wall_median'] * 1000:>10.2f} ms {result['mb_per_s'] or 0:>9.1f} MB/s {rss:>10} {traced:>12}"
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='codemods.bench', description='Benchmark codemod transforms on synthetic TSX corpora.')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='comma-separated corpus sizes, e.g. 10k,1m,50m')
+    parser.add_argument('--engines', default=DEFAULT_ENGINES, help=f'comma-separated subset of: {", ".join(ENGINES)}')
+    parser.add_argument('--components', type=int, help='filler components per corpus (default: as many as the size needs)')
+    parser.add_argument('--interfaces', type=int, help='how many filler components get a props interface (default: all)')
+    parser.add_argument('--match-sites', type=int, default=1, help='copies of the use-conveyor import in the corpus')
+    parser.add_argument('--repeats', type=int, default=3, help='timed runs per case (after one warm-up)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--case-timeout', type=float, default=CASE_TIMEOUT, help='seconds before a case is killed and recorded as failed')
+    parser.add_argument('--history', type=Path, default=DEFAULT_HISTORY, help='JSON history file to append to')
+    parser.add_argument('--no-history', action='store_true', help='do not record this run')
+    parser.add_argument('--fail-on-regression', action='store_true', help=f'exit 1 if a case is {REGRESSION_RATIO}x slower than last time')
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    engines = [name.strip() for name in args.engines.split(',') if name.strip()]
+    unknown = [name for name in engines if name not in ENGINES]
+    if unknown:
+        print(f'unknown engines: {", ".join(unknown)}', file=sys.stderr)
+        return 2
+
+    run = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {
+            'components': args.components,
+            'interfaces': args.interfaces,
+            'match_sites': args.match_sites,
+            'repeats': args.repeats,
+            'seed': args.seed,
+        },
+        'results': [],
+    }
+    print(f"{'engine':<24} {'size':>7} {'min':>13} {'median':>13} {'throughput':>14} {'peak rss':>10} {'peak traced':>12}")
+    with tempfile.TemporaryDirectory(prefix='codemod-bench-') as directory:
+        for label in args.sizes.split(','):
+            size = parse_size(label)
+            corpus = Path(directory) / f'group-screen-{size}.tsx'
+            corpus.write_text(
+                generate_corpus(size, args.components, args.interfaces, args.match_sites, args.seed), encoding='utf-8'
+            )
+            for engine in engines:
+                result = run_case(engine, corpus, args.repeats, args.case_timeout)
+                result['label'] = format_size(size)
+                run['results'].append(result)
+                print(format_row(result))
+
+    history = load_history(args.history)
+    regressions = find_regressions(history, run)
+    for regression in regressions:
+        print(f'regression: {regression}', file=sys.stderr)
+    if not args.no_history:
+        history.append(run)
+        args.history.write_text(json.dumps(history, indent=2) + '\n', encoding='utf-8')
+    failed = [result for result in run['results'] if 'error' in result]
+    if failed:
+        print(f'{len(failed)} case(s) failed', file=sys.stderr)
+    return 1 if failed or (regressions and args.fail_on_regression) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+INDEX_NAME = 'index.json'
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 10000
+
+
+def digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(chunk_size), b''):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def transform_identity(modules) -> str:
+    from codemods.template import load_template
+
+    parts = []
+    for module in modules:
+        templates = ''.join(f'+{load_template(name).digest[:16]}' for name in getattr(module, 'TEMPLATES', ()))
+        parts.append(f'{module.NAME}@{module.VERSION}{templates}')
+    return ','.join(parts)
+
+
+def atomic_write(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            handle.write(data)
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
+class ResultCache:
+    """On-disk cache of transform results keyed by (input sha256, transform identity).
+
+    Entries record the output digest and the reported status; outputs that
+    differ from their input are stored content-addressed under objects/.
+    The index is an LRU bounded by entry count and by stored object bytes.
+    Workers only read the index and add objects; the owning process merges
+    new entries with record() and persists them with save().
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = DEFAULT_MAX_BYTES, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.entries: dict[str, dict] = {}
+        self.dirty = False
+        self._load()
+
+    @staticmethod
+    def key(input_digest: str, identity: str) -> str:
+        return digest(f'{identity}\0{input_digest}'.encode('utf-8'))
+
+    def _load(self):
+        try:
+            loaded = json.loads((self.directory / INDEX_NAME).read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        if isinstance(loaded, dict):
+            self.entries = dict(sorted(loaded.items(), key=lambda item: item[1].get('used', 0)))
+
+    def _object_path(self, output_digest: str) -> Path:
+        return self.directory / 'objects' / output_digest[:2] / output_digest[2:]
+
+    def lookup(self, key: str, input_digest: str) -> tuple[dict, bytes | None] | None:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry['output'] == input_digest:
+            return entry, None
+        try:
+            data = self._object_path(entry['output']).read_bytes()
+        except OSError:
+            return None
+        if digest(data) != entry['output']:
+            return None
+        return entry, data
+
+    def store_output(self, data: bytes) -> str:
+        output_digest = digest(data)
+        path = self._object_path(output_digest)
+        if not path.exists():
+            atomic_write(path, data)
+        return output_digest
+
+    def record(self, key: str, entry: dict):
+        entry = dict(entry, used=time.time())
+        self.entries.pop(key, None)
+        self.entries[key] = entry
+        self.dirty = True
+
+    def touch(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            entry['used'] = time.time()
+            self.entries[key] = entry
+            self.dirty = True
+
+    def _evict(self):
+        stored = sum(entry.get('size', 0) for entry in self.entries.values())
+        references = Counter(entry['output'] for entry in self.entries.values())
+        while self.entries and (len(self.entries) > self.max_entries or stored > self.max_bytes):
+            key = next(iter(self.entries))
+            entry = self.entries.pop(key)
+            stored -= entry.get('size', 0)
+            references[entry['output']] -= 1
+            if entry.get('size') and references[entry['output']] <= 0:
+                try:
+                    self._object_path(entry['output']).unlink()
+                except OSError:
+                    pass
+
+    def save(self):
+        if not self.dirty:
+            return
+        self._evict()
+        atomic_write(self.directory / INDEX_NAME, json.dumps(self.entries, separators=(',', ':')).encode('utf-8'))
+        self.dirty = False
@@ -0,0 +1,78 @@
+"""Thin client for codemods.daemon.
+
+Usage: python -m codemods.client -t group-screen app/components/battle/group-screen.tsx
+       python -m codemods.client --stats | --stop
+
+Only the standard library is imported so a call costs interpreter startup
+plus one socket round trip; the daemon does the work and sends back what
+the runner would have printed. Editor integrations can skip this module
+and write the JSON request line to the socket themselves.
+"""
+
+import argparse
+import json
+import socket
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_SOCKET = ROOT / '.codemod-daemon.sock'
+
+
+def request(message: dict, socket_path: str | Path = DEFAULT_SOCKET) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(str(socket_path))
+        connection.sendall(json.dumps(message).encode('utf-8') + b'\n')
+        chunks = []
+        while chunk := connection.recv(65536):
+            chunks.append(chunk)
+    return json.loads(b''.join(chunks))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='codemods.client', description='Run codemod transforms through a running codemods.daemon.')
+    parser.add_argument('patterns', nargs='*', help="glob patterns relative to --root, e.g. 'app/**/*.tsx'")
+    parser.add_argument('-t', '--transform', dest='transforms', action='append', default=[], help='transform to apply (repeatable, applied in order)')
+    parser.add_argument('--root', type=Path, default=ROOT, help='directory the patterns are resolved against')
+    parser.add_argument('--dry-run', action='store_true', help='print unified diffs to stdout instead of writing files')
+    parser.add_argument('--strict', action='store_true', help='fail when a transform does not match')
+    parser.add_argument('--profile', type=Path, metavar='TRACE', help='record timing spans and have the daemon write them as a Chrome trace JSON file')
+    parser.add_argument('--profile-top', type=int, default=15, metavar='N', help='spans listed in the --profile summary')
+    parser.add_argument('--socket', type=Path, default=DEFAULT_SOCKET, help='daemon socket path')
+    parser.add_argument('--stats', action='store_true', help='print daemon cache statistics')
+    parser.add_argument('--stop', action='store_true', help='shut the daemon down')
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.stats:
+        message = {'op': 'stats'}
+    elif args.stop:
+        message = {'op': 'stop'}
+    else:
+        if not args.patterns or not args.transforms:
+            parser.error('at least one pattern and one -t/--transform are required')
+        message = {
+            'op': 'run',
+            'patterns': args.patterns,
+            'transforms': args.transforms,
+            'root': str(args.root.resolve()),
+            'strict': args.strict,
+            'dry_run': args.dry_run,
+            'profile': None if args.profile is None else str(args.profile.resolve()),
+            'profile_top': args.profile_top,
+        }
+    try:
+        reply = request(message, args.socket)
+    except (OSError, ValueError) as error:
+        print(f'codemods daemon not reachable at {args.socket}: {error}', file=sys.stderr)
+        return 2
+    sys.stdout.write(reply.get('stdout', ''))
+    sys.stderr.write(reply.get('stderr', ''))
+    return reply.get('code', 0)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,410 @@
+"""Long-lived codemod server that keeps decoded files and TSX indexes warm.
+
+Usage: python -m codemods.daemon [--preload 'app/**/*.tsx'] [--max-memory-mb 256]
+       python -m codemods.client -t group-screen app/components/battle/group-screen.tsx
+
+The server listens on a Unix socket for one JSON request line per
+connection ({"op": "run" | "stats" | "stop", ...}) and answers with one JSON
+line holding the stdout, stderr and exit code the runner would have
+produced. Files are revalidated against their (mtime_ns, size, inode) on
+every request and by a periodic sweep, and entries are evicted least
+recently used once their estimated footprint exceeds the memory cap.
+Connections are handled concurrently; the transform work itself runs on a
+single worker thread so two runs never interleave their writes. Each file
+goes through runner.run_file with the warm cache as its loader, so the
+result cache, streaming and profiling behave as they do in the runner.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from codemods import profile, tsx
+from codemods.cache import DEFAULT_MAX_BYTES
+from codemods.client import DEFAULT_SOCKET, ROOT
+from codemods.engine import CodemodError
+from codemods.runner import (
+    DEFAULT_CACHE_DIR,
+    DEFAULT_JOURNAL_DIR,
+    RunOptions,
+    apply_results,
+    decode_source,
+    expand_patterns,
+    open_cache,
+    report_profile,
+    run_batch,
+)
+from codemods.template import TemplateError, precompile
+from codemods.transforms import TRANSFORMS
+from codemods.txn import TransactionError, recover, staging_log
+
+DEFAULT_MAX_MEMORY = 256 * 1024 * 1024
+DEFAULT_RESCAN_INTERVAL = 2.0
+TSX_SUFFIXES = ('.ts', '.tsx')
+
+
+@dataclass(frozen=True)
+class WarmFile:
+    stamp: tuple[int, int, int]
+    raw: bytes
+    text: str
+    newline: str
+
+
+def file_stamp(path: Path) -> tuple[int, int, int]:
+    info = path.stat()
+    return info.st_mtime_ns, info.st_size, info.st_ino
+
+
+class WarmCache:
+    """Decoded files and their TsxDocuments, LRU-evicted under an estimated byte budget.
+
+    Also serves as the document store for tsx.parse(), so transforms reuse
+    the index built for a file's current text instead of retokenizing it.
+    Only the daemon's worker thread touches it.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_MEMORY):
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[tuple[str, str], tuple[object, int]] = OrderedDict()
+        self.total = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get(self, key: tuple[str, str]):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        return entry[0]
+
+    def _put(self, key: tuple[str, str], value, cost: int):
+        self._drop(key)
+        if cost > self.max_bytes:
+            return
+        self.entries[key] = (value, cost)
+        self.total += cost
+        while self.total > self.max_bytes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.total -= evicted
+            self.evictions += 1
+
+    def _drop(self, key: tuple[str, str]):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return None
+        self.total -= entry[1]
+        return entry[0]
+
+    def get(self, text: str) -> tsx.TsxDocument | None:
+        document = self._get(('tsx', text))
+        if document is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return document
+
+    def put(self, text: str, document: tsx.TsxDocument):
+        self._put(('tsx', text), document, sys.getsizeof(text) + document.nbytes)
+
+    def load(self, path: Path) -> WarmFile:
+        """Return the decoded contents of path, rereading it when it changed on disk."""
+        stamp = file_stamp(path)
+        warm = self._get(('file', str(path)))
+        if warm is not None and warm.stamp == stamp:
+            self.hits += 1
+            return warm
+        self.misses += 1
+        if warm is not None:
+            self.forget(path)
+        raw = path.read_bytes()
+        text, newline = decode_source(raw)
+        warm = WarmFile(stamp, raw, text, newline)
+        self._put(('file', str(path)), warm, len(raw) + sys.getsizeof(text))
+        return warm
+
+    def source(self, path: Path) -> tuple[bytes, tuple[str, str]]:
+        """Loader for runner.run_file: the raw bytes and the already decoded text."""
+        warm = self.load(path)
+        return warm.raw, (warm.text, warm.newline)
+
+    def warm(self, path: Path) -> WarmFile:
+        """Load path and, for TypeScript sources, build its declaration index."""
+        warm = self.load(path)
+        if path.suffix in TSX_SUFFIXES:
+            document = tsx.parse(warm.text)
+            document.index()
+            self.put(warm.text, document)  # re-account now that every token is held
+        return warm
+
+    def forget(self, path: str | Path):
+        warm = self._drop(('file', str(path)))
+        if warm is not None:
+            self._drop(('tsx', warm.text))
+
+    def refresh(self) -> int:
+        """Drop deleted files and rewarm ones that changed on disk; returns how many were touched."""
+        touched = 0
+        for kind, name in [key for key in self.entries if key[0] == 'file']:
+            warm = self.entries[(kind, name)][0]
+            path = Path(name)
+            try:
+                if file_stamp(path) == warm.stamp:
+                    continue
+                self.forget(path)
+                self.warm(path)
+            except (CodemodError, OSError, UnicodeDecodeError):
+                self.forget(path)
+            touched += 1
+        return touched
+
+    def stats(self) -> dict:
+        files = sum(1 for kind, _ in self.entries if kind == 'file')
+        return {
+            'files': files,
+            'documents': len(self.entries) - files,
+            'bytes': self.total,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+def _require_strings(message: dict, key: str):
+    value = message[key]
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise TypeError(f'{key!r} must be a list of strings')
+
+
+class Daemon:
+    def __init__(
+        self,
+        socket_path: Path,
+        cache: WarmCache,
+        journal_dir: Path,
+        rescan_interval: float = DEFAULT_RESCAN_INTERVAL,
+        cache_dir: str | None = None,
+    ):
+        self.socket_path = socket_path
+        self.cache = cache
+        self.journal_dir = journal_dir
+        self.cache_dir = cache_dir
+        self.rescan_interval = rescan_interval
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='codemods-worker')
+        self.requests = 0
+        self.started = time.monotonic()
+
+    async def call(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def serve(self, preload: list[str], root: Path):
+        self.stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, self.stopped.set)
+        server = await asyncio.start_unix_server(self.handle, path=str(self.socket_path))
+        os.chmod(self.socket_path, 0o600)
+        try:
+            preloaded = await self.call(self.preload, preload, root)
+            stats = await self.call(self.cache.stats)
+            print(
+                f'codemods daemon listening on {self.socket_path} '
+                f'(preloaded {preloaded} files, {stats["bytes"] / (1024 * 1024):.1f} MB warm)',
+                file=sys.stderr,
+            )
+            sweeper = asyncio.create_task(self.sweep())
+            async with server:
+                await self.stopped.wait()
+            sweeper.cancel()
+        finally:
+            server.close()
+            self.executor.shutdown(wait=True)
+            try:
+                os.unlink(self.socket_path)
+            except FileNotFoundError:
+                pass
+
+    def preload(self, patterns: list[str], root: Path) -> int:
+        return self.warm_paths(expand_patterns(patterns, root) if patterns else [])
+
+    def warm_paths(self, paths: list[Path]) -> int:
+        count = 0
+        for path in paths:
+            try:
+                self.cache.warm(path)
+            except (CodemodError, OSError, UnicodeDecodeError) as error:
+                print(f'warming skipped {path}: {error}', file=sys.stderr)
+                continue
+            count += 1
+        return count
+
+    async def sweep(self):
+        while True:
+            await asyncio.sleep(self.rescan_interval)
+            await self.call(self.cache.refresh)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        written: list[str] = []
+        try:
+            try:
+                message = json.loads(await reader.readline())
+                reply = await self.dispatch(message)
+                written = reply.pop('written', [])
+            except (ValueError, KeyError, TypeError) as error:
+                reply = {'stderr': f'bad request: {error}\n', 'code': 2}
+            except Exception as error:
+                reply = {'stderr': f'codemods daemon error: {type(error).__name__}: {error}\n', 'code': 1}
+            writer.write(json.dumps(reply).encode('utf-8') + b'\n')
+            await writer.drain()
+        except ConnectionError:
+            pass  # the client went away; nothing left to tell it
+        finally:
+            writer.close()
+        if written and not self.stopped.is_set():
+            # Rewarm rewritten files after replying so the next run finds them indexed.
+            await self.call(self.warm_paths, [Path(path) for path in written])
+
+    async def dispatch(self, message: dict) -> dict:
+        if not isinstance(message, dict):
+            raise TypeError('request must be a JSON object')
+        op = message['op']
+        self.requests += 1
+        if op == 'run':
+            for key in ('patterns', 'transforms'):
+                _require_strings(message, key)
+            for key in ('root', 'profile'):
+                if not isinstance(message.get(key) or '', str):
+                    raise TypeError(f'{key!r} must be a string')
+            if not isinstance(message.get('profile_top', 0), int):
+                raise TypeError("'profile_top' must be an integer")
+            return await self.call(self.run, message)
+        if op == 'stats':
+            stats = await self.call(self.cache.stats)
+            stats['requests'] = self.requests
+            stats['uptime'] = round(time.monotonic() - self.started, 1)
+            return {'stdout': ''.join(f'{key}: {value}\n' for key, value in stats.items()), 'code': 0}
+        if op == 'stop':
+            self.stopped.set()
+            return {'stderr': 'codemods daemon stopping\n', 'code': 0}
+        raise ValueError(f'unknown op {op!r}')
+
+    def run(self, message: dict) -> dict:
+        names = list(message['transforms'])
+        unknown = [name for name in names if name not in TRANSFORMS]
+        if not names or unknown:
+            return {'stderr': f'unknown transforms: {", ".join(unknown) or "none given"}\n', 'code': 2}
+        root = Path(message.get('root') or ROOT)
+        paths = expand_patterns(list(message['patterns']), root)
+        if not paths:
+            return {'stderr': 'no files matched\n', 'code': 1}
+        trace = message.get('profile')
+        options = RunOptions(
+            strict=bool(message.get('strict')),
+            cache_dir=self.cache_dir,
+            dry_run=bool(message.get('dry_run')),
+            root=str(root),
+            profile=bool(trace),
+            staging_log=str(staging_log(self.journal_dir)),
+        )
+        stdout, stderr = io.StringIO(), io.StringIO()
+        started = time.perf_counter()
+        if options.profile:
+            profile.enable()
+        try:
+            outcome = apply_results(
+                run_batch(paths, names, options, self.cache.source),
+                self.journal_dir, options, started, open_cache(self.cache_dir), stdout=stdout, stderr=stderr,
+            )
+        except (CodemodError, OSError) as error:
+            print(f'run failed: {error}', file=stderr)
+            return {'stdout': stdout.getvalue(), 'stderr': stderr.getvalue(), 'code': 1}
+        finally:
+            spans = profile.disable()
+        if options.profile:
+            report_profile(outcome.spans + spans, Path(trace), message.get('profile_top', 15), stderr)
+        for path in outcome.written:
+            self.cache.forget(path)
+        return {
+            'stdout': stdout.getvalue(),
+            'stderr': stderr.getvalue(),
+            'code': 1 if outcome.counts.get('error') else 0,
+            'written': outcome.written,
+        }
+
+
+def claim_socket(path: Path) -> bool:
+    """Remove a stale socket file; False when another daemon is still answering on it."""
+    if not path.exists():
+        return True
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(str(path))
+        except OSError:
+            path.unlink()
+            return True
+    return False
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='codemods.daemon', description='Serve codemod runs from a warm in-memory cache over a Unix socket.')
+    parser.add_argument('--socket', type=Path, default=DEFAULT_SOCKET, help='socket path to listen on')
+    parser.add_argument('--root', type=Path, default=ROOT, help='directory the preload patterns are resolved against')
+    parser.add_argument('--preload', action='append', default=[], metavar='PATTERN', help="glob to load and index at startup (repeatable), e.g. 'app/**/*.tsx'")
+    parser.add_argument('--max-memory-mb', type=float, default=DEFAULT_MAX_MEMORY / (1024 * 1024), help='estimated memory cap for warm files and indexes')
+    parser.add_argument('--rescan-interval', type=float, default=DEFAULT_RESCAN_INTERVAL, help='seconds between checks of cached files for changes on disk')
+    parser.add_argument('--journal-dir', type=Path, default=DEFAULT_JOURNAL_DIR, help='where the write-ahead manifest is kept')
+    parser.add_argument('--cache-dir', type=Path, default=DEFAULT_CACHE_DIR, help='incremental result cache location, shared with the runner')
+    parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help='upper bound for cached outputs')
+    parser.add_argument('--no-cache', action='store_true', help='always rerun the transforms')
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    socket_path = args.socket.resolve()
+    if not claim_socket(socket_path):
+        print(f'a codemods daemon is already listening on {socket_path}', file=sys.stderr)
+        return 1
+
+    try:
+        precompile()
+    except TemplateError as error:
+        print(f'template error: {error}', file=sys.stderr)
+        return 1
+
+    journal_dir = args.journal_dir.resolve()
+    try:
+        recovered = recover(journal_dir)
+    except TransactionError as error:
+        print(error, file=sys.stderr)
+        return 1
+    if recovered is not None:
+        action, count = recovered
+        print(f'recovered interrupted run: {action} {count} file(s)', file=sys.stderr)
+
+    cache_dir = None if args.no_cache else str(args.cache_dir.resolve())
+    open_cache(cache_dir, args.cache_max_mb * 1024 * 1024)
+    cache = WarmCache(int(args.max_memory_mb * 1024 * 1024))
+    tsx.use_documents(cache)
+    daemon = Daemon(socket_path, cache, journal_dir, args.rescan_interval, cache_dir)
+    try:
+        asyncio.run(daemon.serve(args.preload, args.root.resolve()))
+    finally:
+        tsx.use_documents(None)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,220 @@
+from dataclasses import dataclass
+
+BLOCK = 64 * 1024
+
+
+@dataclass
+class DiffStats:
+    hunks: int = 0
+    added: int = 0
+    removed: int = 0
+
+
+def _common_prefix(a: str, b: str) -> int:
+    limit = min(len(a), len(b))
+    position = 0
+    while position + BLOCK <= limit and a[position:position + BLOCK] == b[position:position + BLOCK]:
+        position += BLOCK
+    low, high = position, min(position + BLOCK, limit)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[position:middle] == b[position:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _common_suffix(a: str, b: str, limit: int) -> int:
+    size = 0
+    while size + BLOCK <= limit and a[len(a) - size - BLOCK:len(a) - size] == b[len(b) - size - BLOCK:len(b) - size]:
+        size += BLOCK
+    low, high = size, min(size + BLOCK, limit)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if a[len(a) - middle:len(a) - size] == b[len(b) - middle:len(b) - size]:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def _trim(a: str, b: str) -> tuple[int, int]:
+    """Return (prefix, suffix) character counts of shared whole lines."""
+    prefix = _common_prefix(a, b)
+    if prefix < len(a) or prefix < len(b):
+        prefix = a.rfind('\n', 0, prefix) + 1
+    suffix = _common_suffix(a, b, min(len(a), len(b)) - prefix)
+    if suffix:
+        a_start, b_start = len(a) - suffix, len(b) - suffix
+        at_line_start = (a_start == prefix or a[a_start - 1] == '\n') and (b_start == prefix or b[b_start - 1] == '\n')
+        if not at_line_start:
+            newline = a.find('\n', a_start)
+            suffix = len(a) - newline - 1 if newline != -1 else 0
+    return prefix, suffix
+
+
+def _lines_before(text: str, end: int, count: int) -> list[str]:
+    start = end
+    for _ in range(count):
+        if start == 0:
+            break
+        start = text.rfind('\n', 0, start - 1) + 1
+    return text[start:end].splitlines(keepends=True)
+
+
+def _lines_after(text: str, start: int, count: int) -> list[str]:
+    end = start
+    for _ in range(count):
+        if end >= len(text):
+            break
+        newline = text.find('\n', end)
+        end = len(text) if newline == -1 else newline + 1
+    return text[start:end].splitlines(keepends=True)
+
+
+def _middle_snake(a, alo, ahi, b, blo, bhi):
+    n = ahi - alo
+    m = bhi - blo
+    delta = n - m
+    odd = delta & 1
+    limit = (n + m + 1) // 2
+    offset = limit + 1
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+    for d in range(limit + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            start_x, start_y = x, y
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            reverse_k = delta - k
+            if odd and -(d - 1) <= reverse_k <= d - 1 and x + backward[offset + reverse_k] >= n:
+                return start_x, start_y, x, y
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            start_x, start_y = x, y
+            while x < n and y < m and a[ahi - 1 - x] == b[bhi - 1 - y]:
+                x += 1
+                y += 1
+            backward[offset + k] = x
+            forward_k = delta - k
+            if not odd and -d <= forward_k <= d and x + forward[offset + forward_k] >= n:
+                return n - x, m - y, n - start_x, m - start_y
+    raise AssertionError('no middle snake')
+
+
+def _matching_blocks(a, alo, ahi, b, blo, bhi, blocks):
+    start_lo, start_blo = alo, blo
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        alo += 1
+        blo += 1
+    if alo > start_lo:
+        blocks.append((start_lo, start_blo, alo - start_lo))
+    end_hi = ahi
+    while ahi > alo and bhi > blo and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+    suffix = (ahi, bhi, end_hi - ahi) if end_hi > ahi else None
+    if alo < ahi and blo < bhi:
+        x, y, u, v = _middle_snake(a, alo, ahi, b, blo, bhi)
+        if (x, y) == (0, 0) and (u, v) == (ahi - alo, bhi - blo):
+            blocks.append((alo, blo, u - x))
+        else:
+            _matching_blocks(a, alo, alo + x, b, blo, blo + y, blocks)
+            if u > x:
+                blocks.append((alo + x, blo + y, u - x))
+            _matching_blocks(a, alo + u, ahi, b, blo + v, bhi, blocks)
+    if suffix:
+        blocks.append(suffix)
+
+
+def matching_blocks(a: list, b: list) -> list[tuple[int, int, int]]:
+    """Myers' linear-space diff: longest common subsequence as (i, j, size) runs."""
+    blocks: list[tuple[int, int, int]] = []
+    _matching_blocks(a, 0, len(a), b, 0, len(b), blocks)
+    merged: list[tuple[int, int, int]] = []
+    for i, j, size in blocks:
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + size)
+        elif size:
+            merged.append((i, j, size))
+    merged.append((len(a), len(b), 0))
+    return merged
+
+
+def _grouped_changes(blocks, context: int):
+    # Yields hunks as lists of (tag, i1, i2, j1, j2), mirroring difflib's grouping.
+    changes = []
+    i = j = 0
+    for block_i, block_j, size in blocks:
+        if i < block_i or j < block_j:
+            changes.append((i, block_i, j, block_j))
+        i, j = block_i + size, block_j + size
+    group = []
+    for change in changes:
+        if group and change[0] - group[-1][1] > 2 * context:
+            yield group
+            group = []
+        group.append(change)
+    if group:
+        yield group
+
+
+def _line(line: str, marker: str) -> str:
+    if line.endswith('\n'):
+        return marker + line
+    return marker + line + '\n\\ No newline at end of file\n'
+
+
+def unified_diff(a: str, b: str, fromfile: str = 'a', tofile: str = 'b', context: int = 3) -> tuple[str, DiffStats]:
+    """Unified diff of two texts plus hunk/line counts.
+
+    Shared leading and trailing lines are skipped by comparing the raw
+    strings in blocks, so only the changed middle is split into lines and
+    fed to the Myers diff; context lines come from the trimmed edges.
+    """
+    stats = DiffStats()
+    if a == b:
+        return '', stats
+    prefix, suffix = _trim(a, b)
+    head_lines = _lines_before(a, prefix, context)
+    tail_lines = _lines_after(a, len(a) - suffix, context)
+    lines_a = head_lines + a[prefix:len(a) - suffix].splitlines(keepends=True) + tail_lines
+    lines_b = head_lines + b[prefix:len(b) - suffix].splitlines(keepends=True) + tail_lines
+    line_offset = a.count('\n', 0, prefix) - len(head_lines)
+
+    interned: dict[str, int] = {}
+    ids_a = [interned.setdefault(line, len(interned)) for line in lines_a]
+    ids_b = [interned.setdefault(line, len(interned)) for line in lines_b]
+    blocks = matching_blocks(ids_a, ids_b)
+
+    output = [f'--- {fromfile}\n', f'+++ {tofile}\n']
+    for group in _grouped_changes(blocks, context):
+        first, last = group[0], group[-1]
+        i1, j1 = max(0, first[0] - context), max(0, first[2] - context)
+        i2, j2 = min(len(lines_a), last[1] + context), min(len(lines_b), last[3] + context)
+        old_start = line_offset + i1 + (1 if i2 > i1 else 0)
+        new_start = line_offset + j1 + (1 if j2 > j1 else 0)
+        output.append(f'@@ -{old_start},{i2 - i1} +{new_start},{j2 - j1} @@\n')
+        stats.hunks += 1
+        i = i1
+        for change_i1, change_i2, change_j1, change_j2 in group:
+            output.extend(_line(line, ' ') for line in lines_a[i:change_i1])
+            output.extend(_line(line, '-') for line in lines_a[change_i1:change_i2])
+            output.extend(_line(line, '+') for line in lines_b[change_j1:change_j2])
+            stats.removed += change_i2 - change_i1
+            stats.added += change_j2 - change_j1
+            i = change_i2
+        output.extend(_line(line, ' ') for line in lines_a[i:i2])
+    return ''.join(output), stats
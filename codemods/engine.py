@@ -0,0 +1,313 @@
+import codecs
+import hashlib
+import os
+import re
+import stat
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from codemods.profile import span
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class CodemodError(Exception):
+    pass
+
+
+class PatternNotFound(CodemodError):
+    def __init__(self, names):
+        self.names = list(names)
+        super().__init__('pattern not found: ' + ', '.join(self.names))
+
+
+@dataclass(frozen=True)
+class Splice:
+    start: int
+    end: int
+    replacement: str
+
+
+class PatternSet:
+    """Named literal patterns matched together in a single left-to-right scan.
+
+    All literals are folded into one alternation (longest first), so the regex
+    engine walks the text once no matter how many patterns are registered.
+    Matches are leftmost-longest and never overlap.
+    """
+
+    def __init__(self):
+        self._literals: dict[str, str] = {}
+        self._regex: re.Pattern | None = None
+        self._group_names: dict[str, str] = {}
+
+    def __len__(self):
+        return len(self._literals)
+
+    def __iter__(self):
+        return iter(self._literals.items())
+
+    @property
+    def longest(self) -> int:
+        return max((len(literal) for literal in self._literals.values()), default=0)
+
+    def add(self, name: str, literal: str):
+        if not literal:
+            raise CodemodError(f'empty pattern: {name}')
+        if name in self._literals:
+            raise CodemodError(f'duplicate pattern: {name}')
+        self._literals[name] = literal
+        self._regex = None
+
+    def compile(self) -> re.Pattern:
+        if not self._literals:
+            raise CodemodError('no patterns registered')
+        if self._regex is None:
+            ordered = sorted(self._literals.items(), key=lambda item: len(item[1]), reverse=True)
+            self._group_names = {f'p{index}': name for index, (name, _) in enumerate(ordered)}
+            alternatives = (f'(?P<p{index}>{re.escape(literal)})' for index, (_, literal) in enumerate(ordered))
+            self._regex = re.compile('|'.join(alternatives))
+        return self._regex
+
+    def finditer(self, text: str, pos: int = 0, endpos: int | None = None):
+        regex = self.compile()
+        group_names = self._group_names
+        for match in regex.finditer(text, pos, len(text) if endpos is None else endpos):
+            yield group_names[match.lastgroup], match.start(), match.end()
+
+    def scan(self, text: str) -> dict[str, list[int]]:
+        positions: dict[str, list[int]] = {name: [] for name in self._literals}
+        for name, start, _ in self.finditer(text):
+            positions[name].append(start)
+        return positions
+
+
+class Matches:
+    def __init__(self, rewrite: 'Rewrite', positions: dict[str, list[int]]):
+        self.rewrite = rewrite
+        self.positions = positions
+
+    def splices(self) -> list[Splice]:
+        result = []
+        for name, (old, new) in self.rewrite.replacements.items():
+            for position in self.positions[name]:
+                result.append(Splice(position, position + len(old), new))
+        return result
+
+
+class Rewrite:
+    """A batch of literal replacements and anchors resolved against one scan."""
+
+    def __init__(self):
+        self.patterns = PatternSet()
+        self.replacements: dict[str, tuple[str, str]] = {}
+        self.required: list[str] = []
+
+    def replace(self, name: str, old: str, new: str, required: bool = False):
+        self.patterns.add(name, old)
+        self.replacements[name] = (old, new)
+        if required:
+            self.required.append(name)
+
+    def anchor(self, name: str, literal: str, required: bool = True):
+        self.patterns.add(name, literal)
+        if required:
+            self.required.append(name)
+
+    def scan(self, text: str) -> Matches:
+        with span('rewrite.scan') as step:
+            positions = self.patterns.scan(text)
+            step.add(scanned=len(text), matches=sum(len(found) for found in positions.values()))
+        missing = [name for name in self.required if not positions[name]]
+        if missing:
+            raise PatternNotFound(missing)
+        return Matches(self, positions)
+
+    def apply(self, text: str) -> str:
+        splices = self.scan(text).splices()
+        with span('rewrite.apply') as step:
+            output = apply_splices(text, splices)
+            step.add(copied=len(output), matches=len(splices))
+        return output
+
+    @classmethod
+    def combine(cls, rewrites: dict[str, 'Rewrite']) -> 'Rewrite':
+        combined = cls()
+        for prefix, rewrite in rewrites.items():
+            for name, literal in rewrite.patterns:
+                qualified = f'{prefix}:{name}'
+                if name in rewrite.replacements:
+                    combined.replace(qualified, literal, rewrite.replacements[name][1], name in rewrite.required)
+                else:
+                    combined.anchor(qualified, literal, name in rewrite.required)
+        return combined
+
+
+def apply_splices(text: str, splices: list[Splice]) -> str:
+    parts = []
+    position = 0
+    for splice in sorted(splices, key=lambda item: (item.start, item.end)):
+        if splice.start < position:
+            raise CodemodError(f'overlapping edits at offset {splice.start}')
+        parts.append(text[position:splice.start])
+        parts.append(splice.replacement)
+        position = splice.end
+    parts.append(text[position:])
+    return ''.join(parts)
+
+
+@dataclass
+class StreamResult:
+    counts: dict[str, int] = field(default_factory=dict)
+    changed: bool = False
+    input_digest: str = ''
+    output_digest: str = ''
+    bytes_in: int = 0
+    bytes_out: int = 0
+    staged: Path | None = None
+
+
+def stream_rewrite(
+    source: Path,
+    rewrite: Rewrite,
+    target: Path | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    commit: bool = True,
+    staging: Path | None = None,
+) -> StreamResult:
+    """Apply a literal Rewrite to a file without loading it whole.
+
+    The source is decoded in chunks; only the last longest-pattern-minus-one
+    characters are carried into the next chunk so matches can straddle a
+    boundary. Output goes to a temp file beside the target and is renamed
+    over it only when the bytes differ, so peak memory stays around one chunk
+    plus the replacement payloads. Files that use CRLF throughout are matched
+    as LF and written back as CRLF; mixed endings are matched verbatim. With
+    commit=False a changed output is left staged in the temp file
+    (result.staged) for the caller to swap in; staging names that file
+    instead of a fresh mkstemp one.
+    """
+    with span('stream-rewrite') as step:
+        result = _stream_rewrite(Path(source), rewrite, target, chunk_size, commit, staging)
+        step.add(scanned=result.bytes_in, copied=result.bytes_out, matches=sum(result.counts.values()))
+    return result
+
+
+def _stream_rewrite(source: Path, rewrite: Rewrite, target: Path | None, chunk_size: int, commit: bool, staging: Path | None) -> StreamResult:
+    target = source if target is None else Path(target)
+    result, temp = _stream_pass(source, rewrite, target, chunk_size, staging, normalize=True)
+    if result is None:
+        # Mixed line endings: rescan verbatim so lines no pattern touches keep their bytes.
+        result, temp = _stream_pass(source, rewrite, target, chunk_size, staging, normalize=False)
+    try:
+        missing = [name for name in rewrite.required if not result.counts[name]]
+        if missing:
+            raise PatternNotFound(missing)
+        result.changed = result.input_digest != result.output_digest or source != target
+        if result.changed and not commit:
+            result.staged = Path(temp)
+        elif result.changed:
+            mode_source = target if target.exists() else source
+            os.chmod(temp, stat.S_IMODE(os.stat(mode_source).st_mode))
+            os.replace(temp, target)
+    finally:
+        if result.staged is None and os.path.exists(temp):
+            os.unlink(temp)
+    return result
+
+
+def _first_newline(source: Path, chunk_size: int) -> str:
+    # How the first line ends, read ahead in raw bytes so nothing is written before it is known.
+    previous = b''
+    with open(source, 'rb') as reader:
+        while raw := reader.read(chunk_size):
+            index = raw.find(b'\n')
+            if index != -1:
+                return '\r\n' if (raw[index - 1:index] if index else previous) == b'\r' else '\n'
+            previous = raw[-1:]
+    return '\n'
+
+
+def _stream_pass(
+    source: Path,
+    rewrite: Rewrite,
+    target: Path,
+    chunk_size: int,
+    staging: Path | None,
+    normalize: bool,
+) -> tuple[StreamResult | None, str | None]:
+    """Rewrite source into a temp file beside target; (None, None) if normalize meets mixed line endings.
+
+    With normalize set, a file whose first line ends in CRLF is matched as LF
+    and written back as CRLF, replacements included. That is only lossless
+    when every line does, so a lone LF aborts the pass.
+    """
+    keep = max(rewrite.patterns.longest - 1, 0)
+    result = StreamResult(counts=dict.fromkeys((name for name, _ in rewrite.patterns), 0))
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    input_hash = hashlib.sha256()
+    output_hash = hashlib.sha256()
+    newline = _first_newline(source, chunk_size) if normalize else '\n'
+    pending = ''
+    carriage = ''
+
+    if staging is None:
+        fd, temp = tempfile.mkstemp(dir=target.parent, prefix=f'.{target.name}.', suffix='.tmp')
+        output_file = os.fdopen(fd, 'wb')
+    else:
+        temp = str(staging)
+        output_file = open(temp, 'xb')
+    try:
+        with open(source, 'rb') as reader, output_file as writer:
+            while True:
+                raw = reader.read(chunk_size)
+                final = not raw
+                input_hash.update(raw)
+                result.bytes_in += len(raw)
+                chunk = carriage + decoder.decode(raw, final)
+                carriage = ''
+                if not final and chunk.endswith('\r'):
+                    chunk, carriage = chunk[:-1], '\r'
+                if newline == '\r\n':
+                    crlf = chunk.count('\r\n')
+                    if chunk.count('\n') != crlf:
+                        writer.close()
+                        os.unlink(temp)
+                        return None, None
+                    if crlf:
+                        chunk = chunk.replace('\r\n', '\n')
+
+                buffer = pending + chunk
+                limit = len(buffer) if final else len(buffer) - keep
+                parts = []
+                position = 0
+                for name, start, end in rewrite.patterns.finditer(buffer):
+                    if start >= limit:
+                        break
+                    result.counts[name] += 1
+                    parts.append(buffer[position:start])
+                    parts.append(rewrite.replacements[name][1] if name in rewrite.replacements else buffer[start:end])
+                    position = end
+                emit_end = len(buffer) if final else max(position, limit)
+                parts.append(buffer[position:emit_end])
+                pending = buffer[emit_end:]
+
+                output = ''.join(parts)
+                if newline == '\r\n':
+                    output = output.replace('\n', '\r\n')
+                data = output.encode('utf-8')
+                output_hash.update(data)
+                writer.write(data)
+                result.bytes_out += len(data)
+                if final:
+                    break
+            writer.flush()
+            os.fsync(writer.fileno())
+    except BaseException:
+        if os.path.exists(temp):
+            os.unlink(temp)
+        raise
+    result.input_digest = input_hash.hexdigest()
+    result.output_digest = output_hash.hexdigest()
+    return result, temp
@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+    def add(self, scanned: int = 0, copied: int = 0, matches: int = 0):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    __slots__ = ('recorder', 'name', 'args', 'start', 'children', 'scanned', 'copied', 'matches')
+
+    def __init__(self, recorder: 'Recorder', name: str, args: dict):
+        self.recorder = recorder
+        self.name = name
+        self.args = args
+        self.children = 0
+        self.scanned = 0
+        self.copied = 0
+        self.matches = 0
+
+    def add(self, scanned: int = 0, copied: int = 0, matches: int = 0):
+        self.scanned += scanned
+        self.copied += copied
+        self.matches += matches
+
+    def __enter__(self):
+        self.recorder.stack.append(self)
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        duration = time.perf_counter_ns() - self.start
+        stack = self.recorder.stack
+        stack.pop()
+        if stack:
+            stack[-1].children += duration
+        self.recorder.records.append({
+            'name': self.name,
+            'start': self.start,
+            'duration': duration,
+            'self': duration - self.children,
+            'depth': len(stack),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'scanned': self.scanned,
+            'copied': self.copied,
+            'matches': self.matches,
+            **self.args,
+        })
+        return False
+
+
+class Recorder:
+    def __init__(self):
+        self.stack: list[Span] = []
+        self.records: list[dict] = []
+
+
+_recorder: Recorder | None = None
+
+
+def span(name: str, **args):
+    """Open a named timing span; a shared no-op object when profiling is off."""
+    if _recorder is None:
+        return NULL_SPAN
+    return Span(_recorder, name, args)
+
+
+def enable():
+    global _recorder
+    if _recorder is None:
+        _recorder = Recorder()
+
+
+def disable() -> list[dict]:
+    global _recorder
+    records = drain()
+    _recorder = None
+    return records
+
+
+def drain() -> list[dict]:
+    if _recorder is None:
+        return []
+    records, _recorder.records = _recorder.records, []
+    return records
+
+
+def write_chrome_trace(records: list[dict], path: Path):
+    origin = min((record['start'] for record in records), default=0)
+    events = []
+    for record in records:
+        args = {key: value for key, value in record.items() if key not in ('name', 'start', 'duration', 'self', 'depth', 'pid', 'tid')}
+        events.append({
+            'name': record['name'],
+            'ph': 'X',
+            'ts': (record['start'] - origin) / 1000,
+            'dur': record['duration'] / 1000,
+            'pid': record['pid'],
+            'tid': record['tid'],
+            'args': args,
+        })
+    Path(path).write_text(json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}), encoding='utf-8')
+
+
+def summarize(records: list[dict], top: int = 15) -> str:
+    totals: dict[str, dict] = {}
+    for record in records:
+        entry = totals.setdefault(record['name'], {'count': 0, 'total': 0, 'self': 0, 'scanned': 0, 'copied': 0, 'matches': 0})
+        entry['count'] += 1
+        for key in ('self', 'scanned', 'copied', 'matches'):
+            entry[key] += record[key]
+        entry['total'] += record['duration']
+    ranked = sorted(totals.items(), key=lambda item: item[1]['self'], reverse=True)[:top]
+    lines = [f"{'span':<36} {'calls':>6} {'self ms':>10} {'total ms':>10} {'scanned':>11} {'copied':>11} {'matches':>8}"]
+    for name, entry in ranked:
+        lines.append(
+            f"{name:<36} {entry['count']:>6} {entry['self'] / 1e6:>10.2f} {entry['total'] / 1e6:>10.2f} "
+            f"{entry['scanned']:>11} {entry['copied']:>11} {entry['matches']:>8}"
+        )
+    return '\n'.join(lines)
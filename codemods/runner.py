@@ -0,0 +1,426 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from codemods import profile
+from codemods.diff import unified_diff
+from codemods.cache import DEFAULT_MAX_BYTES, ResultCache, digest, file_digest, transform_identity
+from codemods.engine import CodemodError, PatternNotFound, Rewrite, stream_rewrite
+from codemods.profile import span
+from codemods.template import TemplateError, precompile
+from codemods.txn import Transaction, TransactionError, discard_staged, recover, stage_bytes, staging_log, staging_path
+from codemods.transforms import TRANSFORMS, get_transform
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_CACHE_DIR = ROOT / '.codemod-cache'
+DEFAULT_JOURNAL_DIR = ROOT / '.codemod-txn'
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_STREAM_THRESHOLD = 16 * 1024 * 1024
+DEFAULT_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class RunOptions:
+    strict: bool = False
+    cache_dir: str | None = None
+    stream_threshold: int | None = DEFAULT_STREAM_THRESHOLD
+    chunk_bytes: int = DEFAULT_CHUNK_BYTES
+    dry_run: bool = False
+    root: str = str(ROOT)
+    profile: bool = False
+    staging_log: str | None = None
+
+
+@dataclass
+class FileResult:
+    path: str
+    status: str
+    applied: list[str] = field(default_factory=list)
+    bytes_in: int = 0
+    bytes_out: int = 0
+    elapsed: float = 0.0
+    message: str = ''
+    cached: bool = False
+    cache_key: str | None = None
+    cache_entry: dict | None = None
+    staged: str | None = None
+    diff: str = ''
+    hunks: int = 0
+    added: int = 0
+    removed: int = 0
+    spans: list[dict] = field(default_factory=list)
+
+
+def expand_patterns(patterns: list[str], root: Path = ROOT) -> list[Path]:
+    seen = {}
+    for pattern in patterns:
+        base = root
+        candidate = Path(pattern)
+        if candidate.is_absolute():
+            base = Path(candidate.anchor)
+            pattern = str(candidate.relative_to(base))
+        matches = sorted(base.glob(pattern.replace('\\', '/')))
+        for match in matches:
+            if match.is_file():
+                seen.setdefault(match.resolve(), None)
+    return list(seen)
+
+
+def display_path(path: str | Path, root: str | Path = ROOT) -> str:
+    try:
+        return Path(path).relative_to(root).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def record_diff(result: FileResult, before: bytes, after: bytes, root: str):
+    shown = display_path(result.path, root)
+    result.diff, stats = unified_diff(before.decode('utf-8'), after.decode('utf-8'), f'a/{shown}', f'b/{shown}')
+    result.hunks, result.added, result.removed = stats.hunks, stats.added, stats.removed
+
+
+def decode_source(raw: bytes) -> tuple[str, str]:
+    text = raw.decode('utf-8')
+    # Only a uniformly CRLF file round-trips through LF; mixed endings stay as they are.
+    crlf = text.count('\r\n')
+    newline = '\r\n' if crlf and crlf == text.count('\n') else '\n'
+    if newline != '\n':
+        text = text.replace('\r\n', '\n')
+    return text, newline
+
+
+def encode_source(text: str, newline: str) -> bytes:
+    if newline != '\n':
+        text = text.replace('\n', newline)
+    return text.encode('utf-8')
+
+
+_caches: dict[str, ResultCache] = {}
+
+
+def open_cache(directory: str | None, max_bytes: int = DEFAULT_MAX_BYTES) -> ResultCache | None:
+    if directory is None:
+        return None
+    cache = _caches.get(directory)
+    if cache is None:
+        cache = _caches[directory] = ResultCache(Path(directory), max_bytes)
+    return cache
+
+
+def transform_in_memory(raw: bytes, modules, options: RunOptions, result: FileResult, decoded: tuple[str, str] | None = None) -> bytes:
+    text, newline = decode_source(raw) if decoded is None else decoded
+    skipped = []
+    for module in modules:
+        try:
+            text = module.transform(text)
+        except PatternNotFound as error:
+            if options.strict:
+                raise
+            skipped.append(f'{module.NAME}: {error}')
+            continue
+        result.applied.append(module.NAME)
+    result.message = '; '.join(skipped)
+    output = encode_source(text, newline)
+    result.bytes_out = len(output)
+    if output != raw:
+        result.status = 'changed'
+    elif not result.applied:
+        result.status = 'skipped'
+    return output
+
+
+def _transform_streaming(path: Path, modules, options: RunOptions, result: FileResult) -> str | None:
+    rewrite = Rewrite.combine({module.NAME: module.REWRITE for module in modules})
+    try:
+        outcome = stream_rewrite(
+            path, rewrite, chunk_size=options.chunk_bytes, commit=False, staging=staging_path(path, options.staging_log)
+        )
+    except PatternNotFound as error:
+        if options.strict:
+            raise
+        result.status = 'skipped'
+        result.message = str(error)
+        return None
+    result.applied = [module.NAME for module in modules]
+    result.bytes_out = outcome.bytes_out
+    result.status = 'changed' if outcome.changed else 'unchanged'
+    result.staged = None if outcome.staged is None else str(outcome.staged)
+    return outcome.output_digest
+
+
+def read_source(path: Path) -> tuple[bytes, tuple[str, str] | None]:
+    """Default loader for run_file: the raw bytes, left for transform_in_memory to decode."""
+    return path.read_bytes(), None
+
+
+def run_file(path: Path, names: list[str], options: RunOptions, load=read_source) -> FileResult:
+    """Transform one file and stage its output; load(path) returns (raw, decoded or None)."""
+    started = time.perf_counter()
+    result = FileResult(str(path), 'unchanged')
+    try:
+        modules = [get_transform(name) for name in names]
+        result.bytes_in = path.stat().st_size
+        streaming = (
+            not options.dry_run
+            and options.stream_threshold is not None
+            and result.bytes_in >= options.stream_threshold
+            and all(getattr(module, 'STREAMABLE', False) for module in modules)
+        )
+        raw, decoded = (None, None) if streaming else load(path)
+        cache = open_cache(options.cache_dir)
+        if cache is not None:
+            input_digest = file_digest(path) if streaming else digest(raw)
+            identity = transform_identity(modules) + (':strict' if options.strict else '')
+            result.cache_key = cache.key(input_digest, identity)
+            with span('cache.lookup'):
+                hit = cache.lookup(result.cache_key, input_digest)
+            if hit is not None:
+                entry, output = hit
+                result.status = entry['status']
+                result.applied = list(entry['applied'])
+                result.message = entry['message']
+                result.cached = True
+                result.bytes_out = result.bytes_in if output is None else len(output)
+                if output is not None:
+                    if options.dry_run:
+                        record_diff(result, path.read_bytes() if raw is None else raw, output, options.root)
+                    else:
+                        result.staged = str(stage_bytes(path, output, options.staging_log))
+                result.elapsed = time.perf_counter() - started
+                return result
+
+        if streaming:
+            output_digest = _transform_streaming(path, modules, options, result)
+            size = 0
+        else:
+            output = transform_in_memory(raw, modules, options, result, decoded)
+            if output != raw:
+                if options.dry_run:
+                    record_diff(result, raw, output, options.root)
+                else:
+                    result.staged = str(stage_bytes(path, output, options.staging_log))
+            output_digest = digest(output)
+            size = len(output) if output != raw else 0
+
+        if cache is not None and output_digest is not None:
+            result.cache_entry = {
+                'output': cache.store_output(output) if size else output_digest,
+                'status': result.status,
+                'applied': result.applied,
+                'message': result.message,
+                'size': size,
+            }
+    except (CodemodError, OSError, UnicodeDecodeError) as error:
+        if result.staged is not None:
+            os.unlink(result.staged)
+            result.staged = None
+        result.status = 'error'
+        result.message = str(error)
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def run_batch(paths: list[Path], names: list[str], options: RunOptions, load=read_source) -> list[FileResult]:
+    if not options.profile:
+        return [run_file(path, names, options, load) for path in paths]
+    profile.enable()
+    results = []
+    for path in paths:
+        with span('run-file', path=display_path(path, Path(options.root))) as step:
+            result = run_file(path, names, options, load)
+            step.add(scanned=result.bytes_in, copied=result.bytes_out)
+        result.spans = profile.drain()
+        results.append(result)
+    return results
+
+
+def chunked(items: list, size: int):
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
+
+
+def run(paths: list[Path], names: list[str], options: RunOptions, jobs: int = 1, batch_size: int = DEFAULT_BATCH_SIZE):
+    batches = list(chunked(paths, max(1, batch_size)))
+    if jobs <= 1 or len(batches) <= 1:
+        for batch in batches:
+            yield from run_batch(batch, names, options)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(run_batch, batch, names, options) for batch in batches]
+        unconsumed: list[FileResult] = []
+        try:
+            for index, future in enumerate(futures):
+                unconsumed = future.result()
+                while unconsumed:
+                    yield unconsumed[0]
+                    del unconsumed[0]
+        except BaseException:
+            # Stop queued batches and drop what finished ones staged; nothing will adopt it now.
+            for future in futures:
+                future.cancel()
+            discard_results(unconsumed)
+            for future in futures[index + 1:]:
+                if not future.cancelled() and future.exception() is None:
+                    discard_results(future.result())
+            raise
+
+
+def discard_results(results: list[FileResult]):
+    for result in results:
+        if result.staged is not None and os.path.exists(result.staged):
+            os.unlink(result.staged)
+
+
+def format_result(result: FileResult, root: Path = ROOT) -> str:
+    line = f'{result.status:<9} {display_path(result.path, root)} ({result.elapsed * 1000:.1f} ms{", cached" if result.cached else ""})'
+    if result.hunks:
+        line += f' +{result.added} -{result.removed} in {result.hunks} hunk{"s" if result.hunks != 1 else ""}'
+    if result.applied:
+        line += ' [' + ', '.join(result.applied) + ']'
+    if result.message:
+        line += f' - {result.message}'
+    return line
+
+
+@dataclass
+class RunOutcome:
+    counts: dict[str, int] = field(default_factory=dict)
+    written: list[str] = field(default_factory=list)
+    spans: list[dict] = field(default_factory=list)
+
+
+def apply_results(results, journal_dir: Path, options: RunOptions, started: float, cache: ResultCache | None = None, stdout=None, stderr=None) -> RunOutcome:
+    """Report each result and commit all staged outputs in one transaction, or none if any file failed.
+
+    Whatever happens, staged files that were never adopted are deleted before
+    returning: those a failed run left behind and, through options.staging_log,
+    any a worker wrote after the results stopped being read.
+    """
+    stdout = sys.stdout if stdout is None else stdout
+    report = (sys.stderr if stderr is None else stderr) if options.dry_run else stdout
+    root = Path(options.root)
+    outcome = RunOutcome()
+    counts = outcome.counts
+    total_bytes = 0
+    totals = {'hunks': 0, 'added': 0, 'removed': 0}
+    try:
+        with Transaction(journal_dir) as transaction:
+            for result in results:
+                print(format_result(result, root), file=report)
+                if result.staged is not None:
+                    transaction.adopt(Path(result.path), Path(result.staged))
+                if result.diff:
+                    stdout.write(result.diff)
+                    totals['hunks'] += result.hunks
+                    totals['added'] += result.added
+                    totals['removed'] += result.removed
+                if cache is not None and result.cache_key is not None:
+                    if result.cached:
+                        cache.touch(result.cache_key)
+                    elif result.cache_entry is not None:
+                        cache.record(result.cache_key, result.cache_entry)
+                counts[result.status] = counts.get(result.status, 0) + 1
+                total_bytes += result.bytes_in
+                outcome.spans.extend(result.spans)
+            if counts.get('error'):
+                transaction.rollback()
+                print(f'rolled back: {len(transaction.entries)} staged file(s) discarded after errors', file=report)
+            else:
+                with span('txn.commit') as step:
+                    step.add(matches=transaction.commit())
+                outcome.written = [entry.target for entry in transaction.entries]
+    finally:
+        close = getattr(results, 'close', None)
+        if close is not None:
+            close()  # lets run() cancel and clean up batches nobody will read
+        if options.staging_log is not None:
+            discard_staged(options.staging_log)
+    if cache is not None:
+        cache.save()
+    elapsed = time.perf_counter() - started
+
+    files = sum(counts.values())
+    summary = ', '.join(f'{count} {status}' for status, count in sorted(counts.items()))
+    rate = total_bytes / (1024 * 1024) / elapsed if elapsed else 0.0
+    print(f'{files} files ({summary}) in {elapsed:.2f}s, {files / elapsed if elapsed else 0:.1f} files/s, {rate:.2f} MB/s', file=report)
+    if options.dry_run:
+        print(f'dry run: {totals["hunks"]} hunks, +{totals["added"]} -{totals["removed"]} lines, nothing written', file=report)
+    return outcome
+
+
+def report_profile(spans: list[dict], trace: Path, top: int, stderr=None):
+    stderr = sys.stderr if stderr is None else stderr
+    profile.write_chrome_trace(spans, trace)
+    print(profile.summarize(spans, top), file=stderr)
+    print(f'trace written to {trace} ({len(spans)} spans)', file=stderr)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='codemods', description='Run codemod transforms over files matched by glob patterns.')
+    parser.add_argument('patterns', nargs='+', help="glob patterns relative to --root, e.g. 'app/**/*.tsx'")
+    parser.add_argument('-t', '--transform', dest='transforms', action='append', required=True, choices=sorted(TRANSFORMS), help='transform to apply (repeatable, applied in order)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='worker processes')
+    parser.add_argument('--batch-size', '--chunk-size', type=int, default=DEFAULT_BATCH_SIZE, help='files per worker batch (--chunk-size is the old spelling)')
+    parser.add_argument('--root', type=Path, default=ROOT, help='directory the patterns are resolved against')
+    parser.add_argument('--cache-dir', type=Path, default=DEFAULT_CACHE_DIR, help='incremental result cache location')
+    parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help='upper bound for cached outputs')
+    parser.add_argument('--no-cache', action='store_true', help='always rerun the transforms')
+    parser.add_argument('--stream-threshold-mb', type=float, default=DEFAULT_STREAM_THRESHOLD / (1024 * 1024), help='stream files at least this large through streamable transforms (0 disables)')
+    parser.add_argument('--chunk-bytes', type=int, default=DEFAULT_CHUNK_BYTES, help='read size used when streaming')
+    parser.add_argument('--journal-dir', type=Path, default=DEFAULT_JOURNAL_DIR, help='where the write-ahead manifest is kept')
+    parser.add_argument('--dry-run', action='store_true', help='print unified diffs to stdout instead of writing files')
+    parser.add_argument('--strict', action='store_true', help='fail when a transform does not match')
+    parser.add_argument('--profile', type=Path, metavar='TRACE', help='record timing spans and write them as a Chrome trace JSON file')
+    parser.add_argument('--profile-top', type=int, default=15, metavar='N', help='spans listed in the --profile summary')
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    names = args.transforms
+    root = args.root.resolve()
+    paths = expand_patterns(args.patterns, root)
+    if not paths:
+        print('no files matched', file=sys.stderr)
+        return 1
+
+    try:
+        precompile()
+    except TemplateError as error:
+        print(f'template error: {error}', file=sys.stderr)
+        return 1
+
+    journal_dir = args.journal_dir.resolve()
+    try:
+        recovered = recover(journal_dir)
+    except TransactionError as error:
+        print(error, file=sys.stderr)
+        return 1
+    if recovered is not None:
+        action, count = recovered
+        print(f'recovered interrupted run: {action} {count} file(s)', file=sys.stderr)
+
+    cache_dir = None if args.no_cache else str(args.cache_dir.resolve())
+    cache = open_cache(cache_dir, args.cache_max_mb * 1024 * 1024)
+
+    started = time.perf_counter()
+    options = RunOptions(
+        strict=args.strict,
+        cache_dir=cache_dir,
+        stream_threshold=int(args.stream_threshold_mb * 1024 * 1024) or None,
+        chunk_bytes=args.chunk_bytes,
+        dry_run=args.dry_run,
+        root=str(root),
+        profile=args.profile is not None,
+        staging_log=str(staging_log(journal_dir)),
+    )
+    if options.profile:
+        profile.enable()
+    outcome = apply_results(run(paths, names, options, args.jobs, args.batch_size), journal_dir, options, started, cache)
+    if options.profile:
+        report_profile(outcome.spans + profile.disable(), args.profile, args.profile_top)
+    return 1 if outcome.counts.get('error') else 0
@@ -0,0 +1,116 @@
+import hashlib
+import marshal
+import re
+from pathlib import Path
+
+from codemods.cache import atomic_write
+from codemods.engine import CodemodError
+from codemods.tsx import TsxError, tokenize
+
+TEMPLATE_DIR = Path(__file__).resolve().parent / 'templates'
+TEMPLATE_SUFFIX = '.tmpl'
+COMPILED_DIR = '__pycache__'
+MAGIC = b'TMPL\x01'
+SLOT_RE = re.compile(r'@\{([A-Za-z_]\w*)\}')
+EMPTY_INTERPOLATION_RE = re.compile(r'\$\{\s*\}')
+EXPRESSION_CONTEXT = {'?', ':', '(', '[', '=', ',', '=>', '&&', '||', '??', '+', 'return'}
+
+
+class TemplateError(CodemodError):
+    pass
+
+
+class Template:
+    """A TSX payload split into literal text and named @{slot} holes.
+
+    parts alternates literal, slot name, literal, ...; rendering is a single
+    join with the slot values dropped into the odd positions.
+    """
+
+    def __init__(self, name: str, parts: tuple[str, ...], digest: str):
+        self.name = name
+        self.parts = parts
+        self.digest = digest
+        self.slots = frozenset(parts[1::2])
+
+    def render(self, **values: str) -> str:
+        missing = sorted(self.slots - values.keys())
+        if missing:
+            raise TemplateError(f'{self.name}: missing slot values: {", ".join(missing)}')
+        pieces = list(self.parts)
+        pieces[1::2] = [values[slot] for slot in self.parts[1::2]]
+        return ''.join(pieces)
+
+
+def _line_of(text: str, offset: int) -> int:
+    return text.count('\n', 0, offset) + 1
+
+
+def _validate(name: str, text: str):
+    try:
+        tokens = tokenize(text)
+    except TsxError as error:
+        raise TemplateError(f'{name}: {error}') from None
+    previous = None
+    for kind, start, end in tokens:
+        value = text[start:end]
+        if kind == 'template':
+            empty = EMPTY_INTERPOLATION_RE.search(value)
+            if empty:
+                raise TemplateError(f'{name}:{_line_of(text, start + empty.start())}: empty ${{}} interpolation')
+        elif kind == 'string' and '${' in value:
+            raise TemplateError(f'{name}:{_line_of(text, start)}: ${{}} inside a quoted string, expected a template literal')
+        elif kind in ('name', 'other') and not value.isascii() and previous in EXPRESSION_CONTEXT:
+            raise TemplateError(
+                f'{name}:{_line_of(text, start)}: bare text {value!r} in an expression, '
+                'missing template literal or ${} interpolation?'
+            )
+        previous = value
+
+
+def compile_template(source: str, name: str = '<template>') -> Template:
+    parts = tuple(SLOT_RE.split(source))
+    # Slots stand in for expressions, so validate with same-length identifiers in their place.
+    _validate(name, SLOT_RE.sub(lambda match: '_' * len(match.group()), source))
+    return Template(name, parts, hashlib.sha256(source.encode('utf-8')).hexdigest())
+
+
+_loaded: dict[Path, tuple[tuple[int, int], Template]] = {}
+
+
+def load_template(name: str, directory: Path = TEMPLATE_DIR) -> Template:
+    """Load a template, reusing the in-process copy or its marshalled bytecode.
+
+    Compiled templates live in __pycache__/<name>c next to the source and are
+    trusted while the source mtime and size match, like .pyc files.
+    """
+    path = directory / name
+    stat = path.stat()
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    loaded = _loaded.get(path)
+    if loaded is not None and loaded[0] == stamp:
+        return loaded[1]
+
+    compiled_path = directory / COMPILED_DIR / f'{name}c'
+    template = None
+    try:
+        data = compiled_path.read_bytes()
+        if data.startswith(MAGIC):
+            mtime, size, parts, digest = marshal.loads(data[len(MAGIC):])
+            if (mtime, size) == stamp:
+                template = Template(name, parts, digest)
+    except (OSError, ValueError, EOFError, TypeError):
+        template = None
+
+    if template is None:
+        template = compile_template(path.read_text(encoding='utf-8'), name)
+        try:
+            atomic_write(compiled_path, MAGIC + marshal.dumps((stamp[0], stamp[1], template.parts, template.digest)))
+        except OSError:
+            pass
+    _loaded[path] = (stamp, template)
+    return template
+
+
+def precompile(directory: Path = TEMPLATE_DIR) -> list[Template]:
+    return [load_template(path.name, directory) for path in sorted(directory.glob(f'*{TEMPLATE_SUFFIX}'))]
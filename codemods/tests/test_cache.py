@@ -0,0 +1,122 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from codemods import runner
+from codemods.cache import INDEX_NAME, ResultCache, digest
+from codemods.engine import Rewrite
+from codemods.transforms import TRANSFORMS
+
+
+@pytest.fixture
+def pairs(monkeypatch):
+    rewrite = Rewrite()
+    rewrite.replace('pair', 'ab', 'AB')
+    module = SimpleNamespace(NAME='pairs', VERSION=1, REWRITE=rewrite, transform=rewrite.apply)
+    monkeypatch.setitem(TRANSFORMS, 'pairs', module)
+    monkeypatch.setattr(runner, '_caches', {})
+    return module
+
+
+def run(tmp_path, capsys, *extra) -> list[str]:
+    code = runner.main([
+        '*.tsx', '-t', 'pairs', '-j', '1', '--root', str(tmp_path / 'src'),
+        '--cache-dir', str(tmp_path / 'cache'), '--journal-dir', str(tmp_path / 'journal'), *extra,
+    ])
+    assert code == 0
+    runner._caches.clear()  # each main() call stands for a fresh process
+    return sorted(line for line in capsys.readouterr().out.splitlines() if line.endswith(']') or 'cached' in line)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    source = tmp_path / 'src'
+    source.mkdir()
+    (source / 'one.tsx').write_text('ab\n')
+    (source / 'two.tsx').write_text('cd\n')
+    return source
+
+
+def test_hit_for_unchanged_output_writes_nothing(tmp_path, capsys, pairs, tree):
+    first = run(tmp_path, capsys)
+    assert [line.split()[0] for line in first] == ['changed', 'unchanged']
+    assert (tree / 'one.tsx').read_text() == 'AB\n'
+
+    run(tmp_path, capsys)  # records the already-rewritten content
+    os.utime(tree / 'one.tsx', (1_000_000, 1_000_000))
+    os.utime(tree / 'two.tsx', (1_000_000, 1_000_000))
+    third = run(tmp_path, capsys)
+    assert all('cached' in line for line in third)
+    assert [line.split()[0] for line in third] == ['unchanged', 'unchanged']
+    assert os.stat(tree / 'one.tsx').st_mtime == os.stat(tree / 'two.tsx').st_mtime == 1_000_000
+    assert sorted(os.listdir(tree)) == ['one.tsx', 'two.tsx']
+
+
+def test_hit_replays_cached_output(tmp_path, capsys, pairs, tree):
+    run(tmp_path, capsys)
+    (tree / 'one.tsx').write_text('ab\n')
+    pairs.transform = lambda text: pytest.fail('cache miss')
+    lines = run(tmp_path, capsys)
+    assert lines[0].startswith('changed') and 'cached' in lines[0]
+    assert (tree / 'one.tsx').read_text() == 'AB\n'
+
+
+@pytest.mark.parametrize('change', ['version', 'strict', 'content'])
+def test_identity_and_content_changes_miss(tmp_path, capsys, pairs, tree, change):
+    run(tmp_path, capsys)
+    run(tmp_path, capsys)
+    extra = ()
+    if change == 'version':
+        pairs.VERSION = 2
+    elif change == 'strict':
+        extra = ('--strict',)
+    else:
+        (tree / 'two.tsx').write_text('cd ab\n')
+    lines = run(tmp_path, capsys, *extra)
+    assert any('cached' not in line for line in lines)
+    if change == 'content':
+        assert (tree / 'two.tsx').read_text() == 'cd AB\n'
+
+
+def test_corrupt_object_is_a_miss(tmp_path):
+    cache = ResultCache(tmp_path)
+    output = cache.store_output(b'new')
+    cache.record('key', {'output': output, 'status': 'changed', 'applied': [], 'message': '', 'size': 3})
+    assert cache.lookup('key', digest(b'old'))[1] == b'new'
+    (tmp_path / 'objects' / output[:2] / output[2:]).write_bytes(b'tampered')
+    assert cache.lookup('key', digest(b'old')) is None
+    assert cache.lookup('other', digest(b'old')) is None
+
+
+def entry(output: str, size: int) -> dict:
+    return {'output': output, 'status': 'changed', 'applied': [], 'message': '', 'size': size}
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = ResultCache(tmp_path, max_entries=2)
+    outputs = [cache.store_output(data) for data in (b'first', b'second', b'third')]
+    for key, output in zip('abc', outputs):
+        cache.record(key, entry(output, 5))
+    cache.touch('a')
+    cache.save()
+    reloaded = ResultCache(tmp_path, max_entries=2)
+    assert list(reloaded.entries) == ['c', 'a']
+    assert not (tmp_path / 'objects' / outputs[1][:2] / outputs[1][2:]).exists()
+    assert (tmp_path / 'objects' / outputs[0][:2] / outputs[0][2:]).exists()
+
+
+def test_eviction_by_size_keeps_shared_objects(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=10)
+    shared = cache.store_output(b'shared')
+    cache.record('old', entry(shared, 6))
+    cache.record('new', entry(shared, 6))
+    cache.save()
+    assert list(cache.entries) == ['new']
+    assert (tmp_path / 'objects' / shared[:2] / shared[2:]).exists()
+    assert (tmp_path / INDEX_NAME).exists()
+
+
+def test_unreadable_index_starts_empty(tmp_path):
+    (tmp_path / INDEX_NAME).write_text('{')
+    assert ResultCache(tmp_path).entries == {}
@@ -0,0 +1,56 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from codemods import runner
+from codemods.daemon import Daemon, WarmCache
+from codemods.engine import Rewrite
+from codemods.transforms import TRANSFORMS
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    rewrite = Rewrite()
+    rewrite.replace('pair', 'ab', 'AB')
+    module = SimpleNamespace(NAME='pairs', VERSION=1, STREAMABLE=True, REWRITE=rewrite, transform=rewrite.apply)
+    monkeypatch.setitem(TRANSFORMS, 'pairs', module)
+    monkeypatch.setattr(runner, '_caches', {})
+    source = tmp_path / 'src'
+    source.mkdir()
+    (source / 'one.tsx').write_bytes(b'ab\r\ncd\r\n')
+    (source / 'two.tsx').write_text('cd\n')
+    server = Daemon(tmp_path / 'daemon.sock', WarmCache(), tmp_path / 'journal', cache_dir=str(tmp_path / 'cache'))
+    yield server
+    server.executor.shutdown()
+
+
+def request(tmp_path, **extra) -> dict:
+    return {'op': 'run', 'patterns': ['*.tsx'], 'transforms': ['pairs'], 'root': str(tmp_path / 'src'), **extra}
+
+
+def test_run_shares_the_result_cache_with_the_runner(tmp_path, capsys, daemon):
+    reply = daemon.run(request(tmp_path))
+    assert reply['code'] == 0 and reply['written'] == [str(tmp_path / 'src' / 'one.tsx')]
+    assert (tmp_path / 'src' / 'one.tsx').read_bytes() == b'AB\r\ncd\r\n'
+
+    (tmp_path / 'src' / 'one.tsx').write_bytes(b'ab\r\ncd\r\n')
+    runner._caches.clear()
+    code = runner.main([
+        '*.tsx', '-t', 'pairs', '-j', '1', '--root', str(tmp_path / 'src'),
+        '--cache-dir', str(tmp_path / 'cache'), '--journal-dir', str(tmp_path / 'journal'),
+    ])
+    assert code == 0
+    assert all('cached' in line for line in capsys.readouterr().out.splitlines() if line.endswith(']'))
+    assert (tmp_path / 'src' / 'one.tsx').read_bytes() == b'AB\r\ncd\r\n'
+    assert list((tmp_path / 'journal' / 'staging').iterdir()) == []
+
+
+def test_run_writes_a_profile(tmp_path, daemon):
+    trace = tmp_path / 'trace.json'
+    reply = daemon.run(request(tmp_path, dry_run=True, profile=str(trace), profile_top=3))
+    assert reply['code'] == 0
+    assert '-ab' in reply['stdout'] and f'trace written to {trace}' in reply['stderr']
+    names = {event['name'] for event in json.loads(trace.read_text())['traceEvents']}
+    assert {'run-file', 'txn.commit'} <= names
+    assert (tmp_path / 'src' / 'one.tsx').read_bytes() == b'ab\r\ncd\r\n'
@@ -0,0 +1,138 @@
+import random
+import re
+
+import pytest
+
+from codemods.diff import matching_blocks, unified_diff
+
+HUNK_RE = re.compile(r'@@ -(\d+),(\d+) \+(\d+),(\d+) @@\n')
+
+
+def apply_patch(original: str, patch: str) -> str:
+    """Apply a unified diff the way patch(1) reads it, honouring no-newline markers."""
+    source = original.splitlines(keepends=True)
+    lines = patch.splitlines(keepends=True)
+    if not lines:
+        return original
+    assert lines[0].startswith('--- ') and lines[1].startswith('+++ ')
+    output: list[str] = []
+    position = 0
+    index = 2
+    while index < len(lines):
+        match = HUNK_RE.fullmatch(lines[index])
+        assert match, lines[index]
+        old_start, old_count, new_start, new_count = map(int, match.groups())
+        start = old_start - 1 if old_count else old_start
+        assert start >= position
+        output.extend(source[position:start])
+        position = start
+        index += 1
+        removed = added = 0
+        while index < len(lines) and not lines[index].startswith('@@'):
+            marker, text = lines[index][0], lines[index][1:]
+            index += 1
+            if index < len(lines) and lines[index] == '\\ No newline at end of file\n':
+                text = text[:-1]
+                index += 1
+            if marker in ' -':
+                assert source[position] == text
+                position += 1
+                removed += 1
+            if marker in ' +':
+                output.append(text)
+                added += 1
+        assert (removed, added) == (old_count, new_count)
+    output.extend(source[position:])
+    return ''.join(output)
+
+
+def lcs_length(a: list, b: list) -> int:
+    lengths = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(len(a) - 1, -1, -1):
+        for j in range(len(b) - 1, -1, -1):
+            lengths[i][j] = lengths[i + 1][j + 1] + 1 if a[i] == b[j] else max(lengths[i + 1][j], lengths[i][j + 1])
+    return lengths[0][0]
+
+
+def check(a: str, b: str, context: int = 3):
+    patch, stats = unified_diff(a, b, context=context)
+    assert apply_patch(a, patch) == b
+    lines_a, lines_b = a.splitlines(keepends=True), b.splitlines(keepends=True)
+    common = lcs_length(lines_a, lines_b)
+    assert (stats.removed, stats.added) == (len(lines_a) - common, len(lines_b) - common)
+    assert stats.hunks == patch.count('\n@@ ') + patch.startswith('@@ ')
+    return patch, stats
+
+
+def test_identical_texts_have_no_diff():
+    assert unified_diff('a\nb\n', 'a\nb\n') == ('', unified_diff('', '')[1])
+
+
+@pytest.mark.parametrize('a, b', [
+    ('a\nb\n', 'a\nb'),
+    ('a\nb', 'a\nb\n'),
+    ('a\nb', 'a\nc'),
+    ('a', ''),
+    ('', 'a'),
+    ('x\n' * 10 + 'end', 'x\n' * 10 + 'end\n'),
+])
+def test_no_trailing_newline(a, b):
+    patch, _ = check(a, b)
+    assert patch.count('\\ No newline at end of file\n') == (not a.endswith('\n') and a != '') + (not b.endswith('\n') and b != '')
+
+
+def test_missing_newline_marker_follows_last_line():
+    patch, stats = check('a\nb\n', 'a\nb')
+    assert patch.endswith('-b\n+b\n\\ No newline at end of file\n')
+    assert (stats.hunks, stats.added, stats.removed) == (1, 1, 1)
+
+
+def test_missing_newline_marker_only_inside_a_hunk():
+    patch, _ = check('x\n' * 10 + 'y', 'z\n' + 'x\n' * 9 + 'y')
+    assert 'No newline' not in patch
+
+
+def test_distant_changes_make_separate_hunks():
+    a = ''.join(f'line {n}\n' for n in range(40))
+    b = a.replace('line 2\n', 'two\n').replace('line 30\n', 'thirty\n')
+    patch, stats = check(a, b)
+    assert stats.hunks == 2
+    assert '@@ -1,6 +1,6 @@\n' in patch
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_random_round_trip(seed):
+    rng = random.Random(seed)
+    alphabet = ['a\n', 'b\n', 'c\n', '\n', 'a', 'b']
+    a = ''.join(rng.choice(alphabet) for _ in range(rng.randrange(30)))
+    b = list(a.splitlines(keepends=True))
+    for _ in range(rng.randrange(1, 5)):
+        at = rng.randrange(len(b) + 1)
+        if b and rng.random() < 0.5:
+            del b[min(at, len(b) - 1)]
+        else:
+            b.insert(at, rng.choice(alphabet))
+    check(a, ''.join(b), context=rng.randrange(4))
+
+
+@pytest.mark.parametrize('seed', range(100))
+def test_matching_blocks_are_a_longest_common_subsequence(seed):
+    rng = random.Random(seed)
+    a = [rng.randrange(4) for _ in range(rng.randrange(25))]
+    b = [rng.randrange(4) for _ in range(rng.randrange(25))]
+    blocks = matching_blocks(a, b)
+    assert blocks[-1] == (len(a), len(b), 0)
+    for i, j, size in blocks:
+        assert a[i:i + size] == b[j:j + size]
+    assert sum(size for _, _, size in blocks) == lcs_length(a, b)
+
+
+def test_trim_across_blocks():
+    body = ''.join(f'const value{n} = {n};\n' for n in range(20000))
+    middle = len(body) // 2
+    cut = body.index('\n', middle) + 1
+    a = body[:cut] + 'old();\n' + body[cut:]
+    b = body[:cut] + 'new();\n' + body[cut:] + 'tail'
+    patch, stats = unified_diff(a, b)
+    assert apply_patch(a, patch) == b
+    assert (stats.hunks, stats.added, stats.removed) == (2, 2, 1)
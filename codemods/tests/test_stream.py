@@ -0,0 +1,120 @@
+import io
+import os
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from codemods.engine import PatternNotFound, Rewrite, stream_rewrite
+from codemods.runner import RunOptions, apply_results, decode_source, encode_source, run_file
+from codemods.transforms import TRANSFORMS
+
+
+def make_rewrite() -> Rewrite:
+    rewrite = Rewrite()
+    rewrite.replace('pair', 'ab', 'X\nY')
+    rewrite.replace('line', 'c\n', '')
+    rewrite.replace('wide', 'éé', 'e')
+    rewrite.anchor('mark', 'zz', required=False)
+    return rewrite
+
+
+def in_memory(raw: bytes, rewrite: Rewrite) -> bytes:
+    text, newline = decode_source(raw)
+    return encode_source(rewrite.apply(text), newline)
+
+
+def random_source(rng: random.Random) -> bytes:
+    style = rng.choice(['\n', '\r\n', 'mixed'])
+    lines = [''.join(rng.choice(['a', 'b', 'c', 'é', 'ab', 'zz', ' ']) for _ in range(rng.randrange(7))) for _ in range(rng.randrange(1, 6))]
+    text = ''.join(line + (rng.choice(['\n', '\r\n']) if style == 'mixed' else style) for line in lines)
+    if rng.random() < 0.3:
+        text = text.rstrip('\r\n')
+    return text.encode('utf-8')
+
+
+def leftovers(directory) -> list[str]:
+    return sorted(name for name in os.listdir(directory) if name.endswith('.tmp'))
+
+
+@pytest.mark.parametrize('seed', range(300))
+def test_stream_matches_in_memory(tmp_path, seed):
+    rng = random.Random(seed)
+    raw = random_source(rng)
+    source = tmp_path / 'source.tsx'
+    source.write_bytes(raw)
+    rewrite = make_rewrite()
+    expected = in_memory(raw, rewrite)
+    for chunk_size in (1, 2, 3, 5, 8, 64):
+        source.write_bytes(raw)
+        result = stream_rewrite(source, rewrite, chunk_size=chunk_size)
+        assert source.read_bytes() == expected, chunk_size
+        assert result.changed == (expected != raw)
+        assert result.bytes_in == len(raw) and result.bytes_out == len(expected)
+    assert leftovers(tmp_path) == []
+
+
+@pytest.mark.parametrize('chunk_size', range(1, 9))
+def test_replacement_before_first_crlf_is_written_as_crlf(tmp_path, chunk_size):
+    source = tmp_path / 'source.tsx'
+    source.write_bytes(b'ab\r\nc\r\nrest\r\n')
+    stream_rewrite(source, make_rewrite(), chunk_size=chunk_size)
+    assert source.read_bytes() == b'X\r\nY\r\nrest\r\n'
+
+
+@pytest.mark.parametrize('chunk_size', [1, 4, 1024])
+def test_mixed_line_endings_are_kept(tmp_path, chunk_size):
+    raw = b'keep\r\nab\nkeep\r\n'
+    source = tmp_path / 'source.tsx'
+    source.write_bytes(raw)
+    stream_rewrite(source, make_rewrite(), chunk_size=chunk_size)
+    assert source.read_bytes() == b'keep\r\nX\nY\nkeep\r\n'
+
+
+def test_counts_matches_across_chunks(tmp_path):
+    source = tmp_path / 'source.tsx'
+    source.write_bytes(b'ab ab zz ab\n')
+    result = stream_rewrite(source, make_rewrite(), chunk_size=1)
+    assert result.counts == {'pair': 3, 'line': 0, 'wide': 0, 'mark': 1}
+
+
+def test_missing_required_pattern_leaves_file_alone(tmp_path):
+    source = tmp_path / 'source.tsx'
+    source.write_bytes(b'ab\n')
+    rewrite = make_rewrite()
+    rewrite.anchor('needed', 'nowhere')
+    with pytest.raises(PatternNotFound):
+        stream_rewrite(source, rewrite, chunk_size=2)
+    assert source.read_bytes() == b'ab\n'
+    assert leftovers(tmp_path) == []
+
+
+def test_uncommitted_output_is_staged(tmp_path):
+    source = tmp_path / 'source.tsx'
+    source.write_bytes(b'ab\n')
+    result = stream_rewrite(source, make_rewrite(), chunk_size=2, commit=False)
+    assert source.read_bytes() == b'ab\n'
+    assert result.staged.read_bytes() == b'X\nY\n'
+    unchanged = stream_rewrite(result.staged, make_rewrite(), commit=False)
+    assert unchanged.staged is None and not unchanged.changed
+
+
+def test_runner_streams_large_files(tmp_path, monkeypatch):
+    rewrite = make_rewrite()
+    module = SimpleNamespace(NAME='pairs', VERSION=1, STREAMABLE=True, REWRITE=rewrite, transform=rewrite.apply)
+    monkeypatch.setitem(TRANSFORMS, 'pairs', module)
+    raw = b'ab\r\nc\r\n' * 50
+    source = tmp_path / 'source.tsx'
+    source.write_bytes(raw)
+
+    streamed = run_file(source, ['pairs'], RunOptions(stream_threshold=1, chunk_bytes=7, root=str(tmp_path)))
+    buffered = run_file(source, ['pairs'], RunOptions(stream_threshold=None, root=str(tmp_path)))
+    assert (streamed.status, buffered.status) == ('changed', 'changed')
+    with open(streamed.staged, 'rb') as left, open(buffered.staged, 'rb') as right:
+        assert left.read() == right.read() == in_memory(raw, rewrite)
+    os.unlink(buffered.staged)
+
+    outcome = apply_results([streamed], tmp_path / 'journal', RunOptions(root=str(tmp_path)), 0.0, stdout=io.StringIO())
+    assert outcome.written == [str(source)]
+    assert source.read_bytes() == b'X\r\nY\r\n' * 50
+    assert leftovers(tmp_path) == []
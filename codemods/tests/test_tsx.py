@@ -0,0 +1,146 @@
+import pytest
+
+from codemods.bench import generate_corpus
+from codemods.engine import PatternNotFound
+from codemods.transforms import group_screen
+from codemods.tsx import TsxDocument, TsxError, line_span, tokenize
+
+
+def declared(text: str, name: str) -> str | None:
+    declaration = TsxDocument(text).find_declaration(name)
+    return None if declaration is None else text[declaration.start:declaration.end]
+
+
+def statements(text: str) -> list[str]:
+    document = TsxDocument(text)
+    document.index()
+    found = sorted(list(document.declarations.values()) + list(document.imports.values()), key=lambda item: item.start)
+    return [text[item.start:item.end] for item in found]
+
+
+def test_tokenize_drops_whitespace_and_comments():
+    text = "const a = 1 // one\n/* two */ let b = 'x'"
+    assert [text[start:end] for _, start, end in tokenize(text)] == ['const', 'a', '=', '1', 'let', 'b', '=', "'x'"]
+
+
+def test_template_literal_is_one_token():
+    text = 'const a = `x ${f({ y: `z` })} w`;'
+    kinds = [(kind, text[start:end]) for kind, start, end in tokenize(text)]
+    assert ('template', '`x ${f({ y: `z` })} w`') in kinds
+    assert kinds[-1] == ('semi', ';')
+
+
+def test_strings_do_not_cross_lines():
+    # An apostrophe in JSX text must not swallow the rest of the file.
+    text = "<p>Don't stop</p>\nconst a = 1\n"
+    assert [text[start:end] for _, start, end in tokenize(text)][-4:] == ['const', 'a', '=', '1']
+
+
+@pytest.mark.parametrize('text', ['const a = `open', 'const a = `${b', 'const a = `${b)}`'])
+def test_broken_templates_raise(text):
+    with pytest.raises(TsxError):
+        tokenize(text)
+
+
+def test_statements_split_at_line_breaks():
+    text = 'const a = 1\nconst b = 2;\nlet c = 3\n'
+    assert statements(text) == ['const a = 1', 'const b = 2;', 'let c = 3']
+
+
+@pytest.mark.parametrize('text', [
+    'const a = b\n  .c()\n  .d',
+    'const a = (x) =>\n  x + 1',
+    'const a = {\n  b: 1,\n  c: [\n    2,\n  ],\n}',
+    'const a = b ??\n  c',
+    'const a = b\n  ? c\n  : d',
+    'type A =\n  | B\n  | C',
+    "import {\n  a,\n  b,\n} from 'm'",
+])
+def test_statements_continue_across_lines(text):
+    assert statements(text + '\nconst after = 1\n') == [text, 'const after = 1']
+
+
+def test_declaration_heads():
+    text = (
+        'export default function Main() {}\n'
+        'export async function* stream() {}\n'
+        'declare const env: string\n'
+        'export abstract class Base {}\n'
+        'export type Id = string\n'
+    )
+    assert declared(text, 'Main') == 'export default function Main() {}'
+    assert declared(text, 'stream') == 'export async function* stream() {}'
+    assert declared(text, 'env') == 'declare const env: string'
+    assert declared(text, 'Base') == 'export abstract class Base {}'
+    assert declared(text, 'Id') == 'export type Id = string'
+    assert declared(text, 'Missing') is None
+
+
+def test_declaration_span_keeps_inner_comments_and_templates():
+    text = (
+        'const before = 1\n'
+        'export const X = () => {\n'
+        '  // } not a close\n'
+        '  /* } nor this */\n'
+        '  return `}\n'
+        'export const X = 3\n'
+        '${"}"}`\n'
+        '}\n'
+        'const after = 2\n'
+    )
+    assert declared(text, 'X') == text[text.index('export const X'):text.index('\nconst after')]
+
+
+@pytest.mark.parametrize('hider', [
+    '/*\n{}\n*/\n',
+    '/* a\n * {}\n */\n',
+    'const old = `\n{}\n`\n',
+    'const old = `${{x}}\n{}\n`\n',
+    "const old = 'a\\\n{}'\n",
+])
+def test_commented_out_duplicates_are_not_declarations(hider):
+    text = hider.replace('{}', 'export const X = 1', 1) + 'export const X = 2\n'
+    assert declared(text, 'X') == 'export const X = 2'
+
+
+def test_comment_markers_inside_strings_do_not_hide_lines():
+    text = "const glob = 'app/**/*.tsx'\nexport const X = 1\nconst end = '*/'\n"
+    assert declared(text, 'X') == 'export const X = 1'
+
+
+def test_only_commented_out_declaration_is_not_found():
+    assert declared('/*\nexport const X = 1\n*/\nconst y = X\n', 'X') is None
+
+
+def test_commented_out_import_is_skipped():
+    text = "/*\nimport a from 'm'\n*/\nimport { b } from 'm'\n"
+    document = TsxDocument(text)
+    found = document.find_import('m')
+    assert text[found.start:found.end] == "import { b } from 'm'"
+    assert document.find_import('other') is None
+
+
+def test_find_tokens_ignores_layout():
+    text = 'const X = () => {\n  return f(a,\n    b)\n}\nconst Y = f(a, b)\n'
+    document = TsxDocument(text)
+    x = document.declaration('X')
+    assert [document.span(*found) for found in document.find_tokens('f(a, b)', within=x)] == [(27, 38)]
+    assert len(document.find_tokens('f( a , b )')) == 2
+    with pytest.raises(PatternNotFound):
+        document.declaration('Z')
+
+
+def test_line_span_folds_blank_line():
+    text = 'a\n\nremove me\n\nb\n'
+    start = text.index('remove')
+    assert text[slice(*line_span(text, start, start + len('remove me')))] == 'remove me\n\n'
+
+
+def test_group_screen_ignores_commented_out_interface():
+    text = generate_corpus(20_000)
+    interface = declared(text, 'CompactGroupOverlayProps')
+    commented = f'/*\n{interface}\n*/\n'
+    at = text.index(interface)
+    output = group_screen.transform(text[:at] + commented + text[at:])
+    assert commented in output
+    assert output.replace(commented, '', 1) == group_screen.transform(text)
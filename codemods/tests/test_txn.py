@@ -0,0 +1,174 @@
+import io
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from codemods import runner
+from codemods.txn import MANIFEST_NAME, STAGING_DIR, Transaction, TransactionError, discard_staged, recover, stage_bytes, staging_log
+
+
+class Crash(Exception):
+    pass
+
+
+@pytest.fixture
+def tree(tmp_path):
+    source = tmp_path / 'src'
+    source.mkdir()
+    (source / 'one.tsx').write_text('one\n')
+    (source / 'two.tsx').write_text('two\n')
+    return source, tmp_path / 'journal'
+
+
+def fail_replacing(monkeypatch, target):
+    """Make os.replace raise when it swaps a staged file over target."""
+    replace = os.replace
+
+    def failing(source, destination):
+        if os.fspath(destination) == str(target) and str(source).endswith('.tmp'):
+            raise Crash(f'replace {destination}')
+        replace(source, destination)
+
+    monkeypatch.setattr(os, 'replace', failing)
+
+
+def stage_all(transaction, source):
+    transaction.stage(source / 'one.tsx', b'ONE\n')
+    transaction.stage(source / 'two.tsx', b'TWO\n')
+    transaction.stage(source / 'three.tsx', b'THREE\n')
+
+
+def assert_untouched(source, journal):
+    assert sorted(path.name for path in source.iterdir()) == ['one.tsx', 'two.tsx']
+    assert (source / 'one.tsx').read_text() == 'one\n'
+    assert (source / 'two.tsx').read_text() == 'two\n'
+    assert not (journal / MANIFEST_NAME).exists()
+
+
+def test_commit_swaps_every_file(tree):
+    source, journal = tree
+    with Transaction(journal) as transaction:
+        stage_all(transaction, source)
+        assert transaction.commit() == 3
+    assert sorted(path.name for path in source.iterdir()) == ['one.tsx', 'three.tsx', 'two.tsx']
+    assert (source / 'two.tsx').read_text() == 'TWO\n'
+    assert not (journal / MANIFEST_NAME).exists()
+
+
+def test_failed_replace_mid_commit_restores_originals(tree, monkeypatch):
+    source, journal = tree
+    fail_replacing(monkeypatch, (source / 'two.tsx').resolve())
+    transaction = Transaction(journal)
+    stage_all(transaction, source)
+    with pytest.raises(Crash):
+        transaction.commit()
+    assert transaction.state == 'rolled back'
+    assert_untouched(source, journal)
+    with pytest.raises(TransactionError):
+        transaction.commit()
+
+
+def test_exception_inside_block_rolls_back(tree):
+    source, journal = tree
+    with pytest.raises(Crash):
+        with Transaction(journal) as transaction:
+            stage_all(transaction, source)
+            raise Crash
+    assert_untouched(source, journal)
+
+
+def test_recover_rolls_back_applying_manifest(tree, monkeypatch):
+    source, journal = tree
+    fail_replacing(monkeypatch, (source / 'three.tsx').resolve())
+    monkeypatch.setattr(Transaction, 'rollback', lambda self: None)  # the process "dies" mid-commit
+    transaction = Transaction(journal)
+    stage_all(transaction, source)
+    with pytest.raises(Crash):
+        transaction.commit()
+    monkeypatch.undo()
+    assert json.loads((journal / MANIFEST_NAME).read_text())['state'] == 'applying'
+    assert (source / 'one.tsx').read_text() == 'ONE\n'
+
+    assert recover(journal) == ('rolled back', 3)
+    assert_untouched(source, journal)
+    assert recover(journal) is None
+
+
+def test_recover_completes_committed_manifest(tree, monkeypatch):
+    source, journal = tree
+    monkeypatch.setattr(Transaction, '_clear_manifest', lambda self: None)
+    monkeypatch.setattr('codemods.txn._cleanup', lambda entries: None)
+    with Transaction(journal) as transaction:
+        stage_all(transaction, source)
+        transaction.commit()
+    monkeypatch.undo()
+    assert json.loads((journal / MANIFEST_NAME).read_text())['state'] == 'committed'
+
+    assert recover(journal) == ('completed', 3)
+    assert sorted(path.name for path in source.iterdir()) == ['one.tsx', 'three.tsx', 'two.tsx']
+    assert (source / 'one.tsx').read_text() == 'ONE\n'
+    assert not (journal / MANIFEST_NAME).exists()
+
+
+def test_recover_rejects_unreadable_manifest(tmp_path):
+    (tmp_path / MANIFEST_NAME).write_text('{')
+    with pytest.raises(TransactionError):
+        recover(tmp_path)
+
+
+def test_discard_staged_removes_unadopted_files(tree):
+    source, journal = tree
+    log = staging_log(journal)
+    adopted = stage_bytes(source / 'one.tsx', b'ONE\n', log)
+    orphan = stage_bytes(source / 'two.tsx', b'TWO\n', log)
+    with Transaction(journal) as transaction:
+        transaction.adopt(source / 'one.tsx', adopted)
+        transaction.commit()
+    assert orphan.exists()
+    assert discard_staged(log) == 1
+    assert sorted(path.name for path in source.iterdir()) == ['one.tsx', 'two.tsx']
+    assert not log.exists()
+
+
+def test_recover_discards_files_staged_by_a_killed_run(tree):
+    source, journal = tree
+    log = staging_log(journal)
+    stage_bytes(source / 'one.tsx', b'ONE\n', log)
+    stage_bytes(source / 'three.tsx', b'THREE\n', log)
+    with open(log, 'a', encoding='utf-8') as handle:
+        handle.write('"' + str(source / 'torn'))  # killed halfway through logging the next one
+    assert recover(journal) == ('discarded', 2)
+    assert_untouched(source, journal)
+    assert list((journal / STAGING_DIR).iterdir()) == []
+    assert recover(journal) is None
+
+
+run_batch = runner.run_batch
+
+
+def exploding_batch(paths, names, options):
+    if any(Path(path).name == 'boom.tsx' for path in paths):
+        raise RuntimeError('worker crashed')
+    return run_batch(paths, names, options)
+
+
+@pytest.mark.parametrize('logged', [True, False])
+def test_failed_worker_leaves_no_staged_files(tmp_path, monkeypatch, logged):
+    source = tmp_path / 'src'
+    source.mkdir()
+    original = 'export const GroupScreen = () => null\n'
+    for name in ('a', 'b', 'boom', 'c', 'd', 'e'):
+        (source / f'{name}.tsx').write_text(original)
+    journal = tmp_path / 'journal'
+    monkeypatch.setattr(runner, 'run_batch', exploding_batch)
+    options = runner.RunOptions(cache_dir=None, root=str(source), staging_log=str(staging_log(journal)) if logged else None)
+    paths = runner.expand_patterns(['*.tsx'], source)
+    results = runner.run(paths, ['group-component'], options, jobs=2, batch_size=1)
+    with pytest.raises(RuntimeError, match='worker crashed'):
+        runner.apply_results(results, journal, options, 0.0, stdout=io.StringIO())
+    assert sorted(path.name for path in source.iterdir()) == ['a.tsx', 'b.tsx', 'boom.tsx', 'c.tsx', 'd.tsx', 'e.tsx']
+    assert all(path.read_text() == original for path in source.iterdir())
+    assert not (journal / MANIFEST_NAME).exists()
+    assert not (journal / STAGING_DIR).exists() or list((journal / STAGING_DIR).iterdir()) == []
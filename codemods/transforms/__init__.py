@@ -0,0 +1,10 @@
+from codemods.transforms import group_component, group_screen
+
+TRANSFORMS = {module.NAME: module for module in (group_screen, group_component)}
+
+
+def get_transform(name: str):
+    try:
+        return TRANSFORMS[name]
+    except KeyError:
+        raise KeyError(f'unknown transform: {name} (available: {", ".join(TRANSFORMS)})') from None
@@ -0,0 +1,22 @@
+from codemods.engine import Splice, apply_splices
+from codemods.profile import span
+from codemods.template import load_template
+from codemods.transforms.group_screen import SLOTS
+from codemods.tsx import parse
+
+NAME = 'group-component'
+VERSION = 3
+TEMPLATES = ('group-screen.tsx.tmpl',)
+
+
+def transform(text: str) -> str:
+    with span('group-component.index') as step:
+        group = parse(text).declaration('GroupScreen')
+        step.add(scanned=len(text), matches=1)
+    with span('group-component.render') as step:
+        new_group = load_template(TEMPLATES[0]).render(**SLOTS).rstrip()
+        step.add(copied=len(new_group))
+    with span('group-component.splice') as step:
+        output = apply_splices(text, [Splice(group.start, group.end, new_group)])
+        step.add(scanned=len(text), copied=len(output), matches=1)
+    return output
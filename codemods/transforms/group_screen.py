@@ -0,0 +1,61 @@
+from codemods.engine import PatternNotFound, Splice, apply_splices
+from codemods.profile import span
+from codemods.template import load_template
+from codemods.tsx import line_span, parse
+
+NAME = 'group-screen'
+VERSION = 3
+
+CONVEYOR_IMPORT = '@/app/hooks/use-conveyor'
+KEY_BADGE_CLASS = 'const keyBadgeClass ='
+KEY_BADGE = '{member.keyBinding && <span className={keyBadgeClass}>{member.keyBinding.toUpperCase()}</span>}'
+
+DECLARATIONS = ('SkillIcon', 'CompactGroupOverlayProps', 'CompactGroupOverlay', 'GroupScreen')
+TEMPLATES = ('compact-group-overlay-props.tsx.tmpl', 'compact-group-overlay.tsx.tmpl', 'group-screen.tsx.tmpl')
+SLOTS = {
+    'role_labels': 'GROUP_LABELS',
+    'media_query': 'COMPACT_MEDIA_QUERY',
+    'audio_src': 'NEXT_TURN_AUDIO_SRC',
+}
+
+
+def transform(text: str) -> str:
+    with span('group-screen.index') as step:
+        document = parse(text)
+        found = {name: document.find_declaration(name) for name in DECLARATIONS}
+        missing = [name for name, declaration in found.items() if declaration is None]
+        if missing:
+            raise PatternNotFound(missing)
+        skill_icon, props, compact, group = found.values()
+        step.add(scanned=len(text), matches=len(found))
+
+    splices = []
+    with span('group-screen.import-removal') as step:
+        conveyor = document.find_import(CONVEYOR_IMPORT)
+        if conveyor is not None:
+            splices.append(Splice(*line_span(text, conveyor.start, conveyor.end), ''))
+            step.add(matches=1)
+
+    with span('group-screen.key-badge-strip') as step:
+        before = len(splices)
+        for first, _ in document.find_tokens(KEY_BADGE_CLASS, within=skill_icon)[:1]:
+            splices.append(Splice(*line_span(text, *document.span(first, document.statement_end(first))), ''))
+        for first, last in document.find_tokens(KEY_BADGE, within=skill_icon):
+            splices.append(Splice(*line_span(text, *document.span(first, last)), ''))
+        step.add(scanned=skill_icon.end - skill_icon.start, matches=len(splices) - before)
+
+    props_template, compact_template, group_template = (load_template(name) for name in TEMPLATES)
+    for name, declaration, template in (
+        ('group-screen.interface-swap', props, props_template),
+        ('group-screen.compact-overlay-splice', compact, compact_template),
+        ('group-screen.group-screen-splice', group, group_template),
+    ):
+        with span(name) as step:
+            rendered = template.render(**SLOTS).rstrip()
+            splices.append(Splice(declaration.start, declaration.end, rendered))
+            step.add(copied=len(rendered), matches=1)
+
+    with span('group-screen.apply') as step:
+        output = apply_splices(text, splices)
+        step.add(scanned=len(text), copied=len(output))
+    return output
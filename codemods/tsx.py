@@ -0,0 +1,448 @@
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from operator import itemgetter
+
+from codemods.engine import CodemodError, PatternNotFound
+from codemods.profile import span
+
+# Whitespace and comments are folded into the prefix of the next token, so
+# every match is one significant token and its kind is match.lastindex.
+TOKEN_RE = re.compile(
+    r'''\s*(?:(?://[^\n]*|/\*.*?\*/)\s*)*'''
+    r'''(?:(?P<string>'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*")'''
+    r'''|(?P<template>`)'''
+    r'''|(?P<name>[A-Za-z_$\u0080-\uffff][\w$\u0080-\uffff]*)'''
+    r'''|(?P<number>\d[\w.]*)'''
+    r'''|(?P<open>[(\[{])'''
+    r'''|(?P<close>[)\]}])'''
+    r'''|(?P<semi>;)'''
+    r'''|(?P<punct>\.\.\.|\?\?=?|\?\.|===|!==|=>|==|!=|<=|>=|&&|\|\||[-+*/%&|^!~<>=?:,.@#])'''
+    r'''|(?P<other>.)'''
+    r'''|(?P<end>\Z))''',
+    re.S,
+)
+# Template literal text, with interpolations that hold no brackets, strings or
+# comments taken whole; anything else stops the match for _scan_interpolation.
+TEMPLATE_RE = re.compile(r'''(?:[^\\`$]+|\\.|\$(?!\{)|\$\{[^{}()\[\]'"`/]*\})*''', re.S)
+# Comments, strings and template openings, for checking that a line start is code.
+LEXICAL_RE = re.compile(r'''//[^\n]*|/\*.*?\*/|'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*"|`''', re.S)
+# The rest of a line whose strings, comments and template literals all close on it;
+# written without nested ambiguity so a line that does not qualify fails fast.
+_PLAIN = r'''[^\n`/'"\\]*'''
+_STRING = r''''[^'\\\n]*(?:\\[^\n][^'\\\n]*)*'|"[^"\\\n]*(?:\\[^\n][^"\\\n]*)*"'''
+_LONE_QUOTE = r''''(?=[^'\\\n]*\n)|"(?=[^"\\\n]*\n)'''
+_SLASH = r'''//[^\n]*|/\*[^*\n]*(?:\*(?!/)[^*\n]*)*\*/|/(?![/*])'''
+_TEMPLATE = r'''`[^\\`$\n]*(?:(?:\\[^\n]|\$(?!\{)|\$\{[^{}()\[\]'"`/\\\n]*\})[^\\`$\n]*)*`'''
+CLOSED_LINE_RE = re.compile(rf'''{_PLAIN}(?:(?:{_STRING}|{_LONE_QUOTE}|{_SLASH}|{_TEMPLATE}){_PLAIN})*\n''')
+KINDS = {index: name for name, index in TOKEN_RE.groupindex.items()}
+STRING, TEMPLATE, NAME, OPEN, CLOSE, SEMI, END = (
+    TOKEN_RE.groupindex[name] for name in ('string', 'template', 'name', 'open', 'close', 'semi', 'end')
+)
+PULL_BLOCK = 4096
+
+CONTINUES_LINE = {
+    '=', '=>', ',', '?', ':', '+', '-', '*', '/', '%', '&&', '||', '??', '.', '?.', '(', '[', '{', '<', '|', '&',
+    '!', '~', '...', 'extends', 'implements', 'as', 'satisfies', 'from',
+}
+CONTINUES_FROM_PREVIOUS = {
+    '=', '=>', ',', '?', ':', '+', '*', '/', '%', '&&', '||', '??', '.', '?.', '(', '[', ')', ']', '}', '|', '&', '>',
+    'as', 'satisfies', 'extends', 'implements', 'from',
+}
+DECLARATION_KEYWORDS = {'interface', 'type', 'const', 'let', 'var', 'function', 'class', 'enum'}
+MODIFIERS = {'export', 'default', 'declare', 'async', 'abstract'}
+
+
+class TsxError(CodemodError):
+    pass
+
+
+@dataclass(frozen=True)
+class Declaration:
+    kind: str
+    name: str
+    start: int
+    end: int
+    first_token: int
+    last_token: int
+
+
+def _scan_template(text: str, position: int) -> int:
+    # position is just past the opening backtick; returns the offset after the closing one.
+    while True:
+        position = TEMPLATE_RE.match(text, position).end()
+        if text.startswith('`', position):
+            return position + 1
+        if not text.startswith('${', position):
+            raise TsxError('unterminated template literal')
+        position = _scan_interpolation(text, position + 2)
+
+
+def _scan_interpolation(text: str, position: int) -> int:
+    depth = 0
+    while True:
+        match = TOKEN_RE.match(text, position)
+        kind = match.lastindex
+        position = match.end()
+        if kind == END:
+            raise TsxError('unterminated template interpolation')
+        if kind == TEMPLATE:
+            position = _scan_template(text, position)
+        elif kind == OPEN:
+            depth += 1
+        elif kind == CLOSE:
+            if depth == 0:
+                if text[position - 1] != '}':
+                    raise TsxError(f'unbalanced {text[position - 1]!r} in template interpolation')
+                return position
+            depth -= 1
+
+
+def _declaration_head(name: str) -> re.Pattern:
+    # A line opening with a declaration of name; top-level statements are not indented.
+    return re.compile(
+        r'(?:(?:export|default|declare|async|abstract)[ \t]+)*'
+        r'(?:(?:interface|type|const|let|var|class|enum|function)[ \t]+|function[ \t]*\*[ \t]*)'
+        + re.escape(name) + r'(?![\w$])'
+    )
+
+
+def tokenize(text: str) -> list[tuple[str, int, int]]:
+    """Split TSX source into (kind, start, end) significant tokens, dropping whitespace and comments.
+
+    JSX text is tokenized like code, which is enough for span matching; string
+    literals never cross a newline so stray apostrophes in JSX text stay local.
+    """
+    tokens = []
+    position = 0
+    while True:
+        match = TOKEN_RE.match(text, position)
+        kind = match.lastindex
+        if kind == END:
+            return tokens
+        start, position = match.span(kind)
+        if kind == TEMPLATE:
+            position = _scan_template(text, position)
+        tokens.append((KINDS[kind], start, position))
+
+
+class TsxDocument:
+    """Tokens plus an index of top-level statements, both built on demand.
+
+    Tokens are kept as parallel start/end/kind arrays and their text is only
+    sliced where a lookup needs it. A declaration (interface X, const X = ...,
+    export const X, function X, ...) or import is first looked for by seeking:
+    lines that start with its head are tokenized for one statement each,
+    leaving the rest of the file untouched. A candidate line counts only once
+    a lexical scan of the text before it shows it is not inside a block
+    comment or template literal. Only when no candidate checks out
+    does the sequential index run, statement by statement, until the name is
+    found. Token-sequence searches compare token text only, so whitespace,
+    line breaks and comments do not affect matching.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.kinds = array('b')
+        self.starts = array('i')
+        self.ends = array('i')
+        self.declarations: dict[str, Declaration] = {}
+        self.imports: dict[str, Declaration] = {}
+        self._closed: list[tuple[int, int]] = []  # (first, last) token ranges of seeked statements
+        self._open: int | None = None  # first token of the segment still being tokenized
+        self._matches = None
+        self._indexed: int | None = None  # next statement of the sequential index, once started
+        self._seeked: set[int] = set()
+        self._lexed = 0  # the prefix before this offset has been checked for hidden lines
+        self._hidden: list[tuple[int, int]] = []  # multi-line block comments and template literals
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.itemsize * len(column) for column in (self.kinds, self.starts, self.ends))
+
+    def value(self, index: int) -> str:
+        return self.text[self.starts[index]:self.ends[index]]
+
+    def _pull(self) -> bool:
+        # Tokenize up to PULL_BLOCK more tokens of the open segment; False once it is exhausted.
+        matches = self._matches
+        if matches is None:
+            return False
+        text = self.text
+        kinds, starts, ends = self.kinds, self.starts, self.ends
+        pulled = 0
+        with span('tsx.tokenize') as step:
+            for match in matches:
+                kind = match.lastindex
+                if kind == END:
+                    break
+                start, end = match.span(kind)
+                if kind == TEMPLATE:
+                    end = _scan_template(text, end)
+                    self._matches = TOKEN_RE.finditer(text, end)
+                kinds.append(kind)
+                starts.append(start)
+                ends.append(end)
+                pulled += 1
+                if kind == TEMPLATE or pulled == PULL_BLOCK:
+                    step.add(scanned=end - starts[-pulled], matches=pulled)
+                    return True
+            self._matches = None
+            if pulled:
+                step.add(scanned=ends[-1] - starts[-pulled], matches=pulled)
+        return pulled > 0
+
+    def _limit(self, index: int) -> int | None:
+        # Last token of the closed segment holding index; None inside the open one.
+        if self._open is not None and index >= self._open:
+            return None
+        return self._closed[bisect_right(self._closed, index, key=itemgetter(0)) - 1][1]
+
+    def _has(self, index: int, limit: int | None) -> bool:
+        if limit is not None:
+            return index <= limit
+        return index < len(self.starts) or self._pull()
+
+    def _breaks_line(self, index: int, limit: int | None) -> bool:
+        if not self._has(index + 1, limit):
+            return True
+        if self.text.find('\n', self.ends[index], self.starts[index + 1]) == -1:
+            return False
+        return self.value(index) not in CONTINUES_LINE and self.value(index + 1) not in CONTINUES_FROM_PREVIOUS
+
+    def statement_end(self, index: int) -> int:
+        kinds = self.kinds
+        limit = self._limit(index)
+        depth = 0
+        position = index
+        while self._has(position, limit):
+            kind = kinds[position]
+            if kind == OPEN:
+                depth += 1
+            elif kind == CLOSE:
+                if depth == 0:
+                    return max(index, position - 1)
+                depth -= 1
+            if depth == 0 and (kind == SEMI or self._breaks_line(position, limit)):
+                return position
+            position += 1
+        return position - 1
+
+    def _index_next(self) -> bool:
+        # Record the next top-level statement; False once every statement is indexed.
+        if self._indexed is None:
+            self._open = self._indexed = len(self.starts)
+            self._matches = TOKEN_RE.finditer(self.text)
+        if not self._has(self._indexed, None):
+            return False
+        with span('tsx.index') as step:
+            end = self.statement_end(self._indexed)
+            self._record(self._indexed, end)
+            self._indexed = end + 1
+            step.add(matches=1)
+        return True
+
+    def index(self):
+        """Tokenize and index the whole document."""
+        while self._index_next():
+            pass
+
+    def _seek(self, offset: int) -> bool:
+        # Tokenize and record the single statement starting at offset, as a closed segment.
+        if self._indexed is not None or offset in self._seeked:
+            return False
+        self._seeked.add(offset)
+        first = len(self.starts)
+        self._open = first
+        self._matches = TOKEN_RE.finditer(self.text, offset)
+        with span('tsx.seek') as step:
+            try:
+                last = self.statement_end(first) if self._has(first, None) else None
+            except TsxError:
+                last = None  # a candidate inside a template literal can run off the end
+            finally:
+                self._open = self._matches = None
+            if last is None:
+                del self.kinds[first:], self.starts[first:], self.ends[first:]
+                return False
+            del self.kinds[last + 1:], self.starts[last + 1:], self.ends[last + 1:]
+            self._closed.append((first, last))
+            self._record(first, last)
+            step.add(scanned=self.ends[last] - offset, matches=last - first + 1)
+        return True
+
+    def _in_code(self, line: int) -> bool:
+        # Whether the line starting at offset line is code rather than the inside of a
+        # block comment, template literal or continued string. Only lines holding '/*',
+        # '`' or a trailing backslash can hide the next one; those that close everything
+        # they open are skipped whole and the rest are lexed construct by construct.
+        text = self.text
+        position = self._lexed
+        comment = tick = escape = -1
+        with span('tsx.lex') as step:
+            while position < line:
+                if tick < position:
+                    tick = text.find('`', position, line) % (line + 1)  # line once there is none
+                if comment < position:
+                    comment = text.find('/*', position, line) % (line + 1)
+                if escape < position:
+                    escape = text.find('\\\n', position, line) % (line + 1)
+                opener = min(comment, tick, escape)
+                if opener == line:
+                    position = line
+                    break
+                start = text.rfind('\n', position, opener) + 1 or position
+                closed = CLOSED_LINE_RE.match(text, start)
+                if closed:
+                    position = closed.end()
+                    continue
+                match = LEXICAL_RE.search(text, start)
+                if match is None or match.start() > opener:
+                    position = opener + 1  # not an opener to the tokenizer either, e.g. an unterminated '/*'
+                    continue
+                start, end = match.span()
+                if text[start] == '`':
+                    try:
+                        end = _scan_template(text, end)
+                    except TsxError:
+                        end = len(text)
+                if text.find('\n', start, end) != -1:
+                    self._hidden.append((start, end))
+                position = end
+            step.add(scanned=max(position - self._lexed, 0))
+            self._lexed = max(position, self._lexed)
+        index = bisect_left(self._hidden, line, key=itemgetter(0)) - 1
+        return index < 0 or self._hidden[index][1] <= line
+
+    def _record(self, first: int, last: int):
+        position = first
+        while position < last and self.value(position) in MODIFIERS:
+            position += 1
+        keyword = self.value(position)
+        start = self.starts[first]
+        end = self.ends[last]
+        if keyword == 'import':
+            for index in range(position + 1, last + 1):
+                if self.kinds[index] == STRING:
+                    source = self.value(index)[1:-1]
+                    self.imports.setdefault(source, Declaration('import', source, start, end, first, last))
+                    break
+            return
+        if keyword not in DECLARATION_KEYWORDS or position + 1 > last:
+            return
+        position += 1
+        if keyword == 'function' and self.value(position) == '*':
+            position += 1
+        if position <= last and self.kinds[position] == NAME:
+            name = self.value(position)
+            self.declarations.setdefault(name, Declaration(keyword, name, start, end, first, last))
+
+    def find_declaration(self, name: str) -> Declaration | None:
+        if name in self.declarations:
+            return self.declarations[name]
+        text = self.text
+        position = text.find(name)
+        if position == -1:
+            return None
+        head = _declaration_head(name)
+        while position != -1:
+            line = text.rfind('\n', 0, position) + 1
+            match = head.match(text, line)
+            if match and match.end() == position + len(name) and self._in_code(line) and self._seek(line) and name in self.declarations:
+                return self.declarations[name]
+            position = text.find(name, position + len(name))
+        while name not in self.declarations and self._index_next():
+            pass
+        return self.declarations.get(name)
+
+    def find_import(self, source: str) -> Declaration | None:
+        if source in self.imports:
+            return self.imports[source]
+        text = self.text
+        for quote in ("'", '"'):
+            needle = quote + source + quote
+            position = text.find(needle)
+            while position != -1:
+                line = text.rfind('\nimport', 0, position) + 1
+                if line or text.startswith('import'):
+                    if self._in_code(line) and self._seek(line) and source in self.imports:
+                        return self.imports[source]
+                position = text.find(needle, position + len(needle))
+        if source not in text:
+            return None
+        while source not in self.imports and self._index_next():
+            pass
+        return self.imports.get(source)
+
+    def declaration(self, name: str) -> Declaration:
+        declaration = self.find_declaration(name)
+        if declaration is None:
+            raise PatternNotFound([name])
+        return declaration
+
+    def find_tokens(self, pattern: str, within: Declaration | None = None) -> list[tuple[int, int]]:
+        needle = [pattern[start:end] for _, start, end in tokenize(pattern)]
+        if not needle:
+            return []
+        if within is None:
+            self.index()
+            low, high = self._open, len(self.starts)
+        else:
+            low, high = within.first_token, within.last_token + 1
+        text = self.text
+        values = [text[start:end] for start, end in zip(self.starts[low:high], self.ends[low:high])]
+        size = len(needle)
+        found = []
+        offset = 0
+        while True:
+            try:
+                offset = values.index(needle[0], offset)
+            except ValueError:
+                return found
+            if values[offset:offset + size] == needle:
+                found.append((low + offset, low + offset + size - 1))
+                offset += size
+            else:
+                offset += 1
+
+    def span(self, first: int, last: int) -> tuple[int, int]:
+        return self.starts[first], self.ends[last]
+
+
+_documents = None
+
+
+def parse(text: str) -> TsxDocument:
+    """Build the TsxDocument for text, reusing one from the installed store if it has it."""
+    if _documents is None:
+        return TsxDocument(text)
+    document = _documents.get(text)
+    if document is None:
+        document = TsxDocument(text)
+        _documents.put(text, document)
+    return document
+
+
+def use_documents(store):
+    """Install a store with get(text) and put(text, document) for parse(); None removes it."""
+    global _documents
+    _documents = store
+
+
+def line_span(text: str, start: int, end: int) -> tuple[int, int]:
+    """Widen [start, end) to whole lines, folding a doubled blank line into one."""
+    line_start = text.rfind('\n', 0, start) + 1
+    if text[line_start:start].strip():
+        line_start = start
+    line_end = text.find('\n', end)
+    line_end = len(text) if line_end == -1 else line_end + 1
+    if text[end:line_end].strip():
+        return line_start, end
+    before = text[:line_start].endswith('\n\n') or line_start == 0
+    if before and text.startswith('\n', line_end):
+        line_end += 1
+    return line_start, line_end
@@ -0,0 +1,225 @@
+import json
+import os
+import shutil
+import stat
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from codemods.engine import CodemodError
+
+MANIFEST_NAME = 'manifest.json'
+BACKUP_SUFFIX = '.codemod-bak'
+STAGING_DIR = 'staging'
+
+
+class TransactionError(CodemodError):
+    pass
+
+
+@dataclass
+class StagedFile:
+    target: str
+    staged: str
+    backup: str
+    existed: bool
+
+
+def _fsync_path(path: str | Path, directory: bool = False):
+    flags = os.O_RDONLY if directory else os.O_RDWR
+    try:
+        fd = os.open(path, flags)
+    except OSError:
+        if directory:
+            return  # directories cannot be opened on Windows; rename durability is best effort there
+        raise
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def staging_log(journal_dir: Path) -> Path:
+    """A fresh log for one run's staged files, kept under journal_dir until the run is over."""
+    return Path(journal_dir) / STAGING_DIR / f'{uuid.uuid4().hex}.log'
+
+
+def staging_path(target: Path, log: str | Path | None = None) -> Path:
+    """A fresh temp path beside target, appended to log before anything is written there."""
+    target = Path(target)
+    path = target.with_name(f'.{target.name}.{uuid.uuid4().hex[:12]}.tmp')
+    if log is not None:
+        log = Path(log)
+        log.parent.mkdir(parents=True, exist_ok=True)
+        with open(log, 'a', encoding='utf-8') as handle:
+            handle.write(json.dumps(str(path)) + '\n')
+    return path
+
+
+def stage_bytes(target: Path, data: bytes, log: str | Path | None = None) -> Path:
+    """Write data to a temp file beside target, ready to be swapped in by a Transaction."""
+    temp = staging_path(target, log)
+    handle = open(temp, 'xb')
+    try:
+        with handle:
+            handle.write(data)
+    except BaseException:
+        os.unlink(temp)
+        raise
+    return temp
+
+
+def discard_staged(log: str | Path) -> int:
+    """Delete the staged files log lists that were never swapped in, then the log itself."""
+    log = Path(log)
+    try:
+        lines = log.read_text(encoding='utf-8').splitlines()
+    except FileNotFoundError:
+        return 0
+    removed = 0
+    for line in lines:
+        try:
+            os.unlink(json.loads(line))
+        except (ValueError, FileNotFoundError):
+            continue  # a line torn by a crash, or a file already swapped in or rolled back
+        removed += 1
+    log.unlink()
+    return removed
+
+
+class Transaction:
+    """Stage many file rewrites, then swap them in together or not at all.
+
+    Outputs are staged as temp files beside their targets. commit() fsyncs
+    them in one batch, records a write-ahead manifest, hard-links each
+    original to a backup and renames the staged file over it. A failure at
+    any point restores every original; a crash leaves the manifest behind
+    for recover() to roll back on the next run.
+    """
+
+    def __init__(self, journal_dir: Path):
+        self.journal_dir = Path(journal_dir)
+        self.entries: list[StagedFile] = []
+        self.state = 'open'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None and self.state == 'open':
+            self.rollback()
+        return False
+
+    def adopt(self, target: Path, staged: Path):
+        if self.state != 'open':
+            raise TransactionError(f'transaction is {self.state}')
+        target = Path(target).resolve()
+        backup = target.with_name(f'.{target.name}.{uuid.uuid4().hex[:8]}{BACKUP_SUFFIX}')
+        self.entries.append(StagedFile(str(target), str(staged), str(backup), target.exists()))
+
+    def stage(self, target: Path, data: bytes):
+        self.adopt(target, stage_bytes(Path(target), data))
+
+    def _write_manifest(self, state: str):
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        manifest = self.journal_dir / MANIFEST_NAME
+        temp = manifest.with_suffix('.tmp')
+        with open(temp, 'w', encoding='utf-8') as handle:
+            json.dump({'state': state, 'entries': [asdict(entry) for entry in self.entries]}, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp, manifest)
+        _fsync_path(self.journal_dir, directory=True)
+
+    def _clear_manifest(self):
+        try:
+            (self.journal_dir / MANIFEST_NAME).unlink()
+        except FileNotFoundError:
+            pass
+
+    def commit(self) -> int:
+        if self.state != 'open':
+            raise TransactionError(f'transaction is {self.state}')
+        if not self.entries:
+            self.state = 'committed'
+            return 0
+        try:
+            for entry in self.entries:
+                if entry.existed:
+                    os.chmod(entry.staged, stat.S_IMODE(os.stat(entry.target).st_mode))
+                _fsync_path(entry.staged)
+            self._write_manifest('applying')
+            for entry in self.entries:
+                if entry.existed:
+                    try:
+                        os.link(entry.target, entry.backup)
+                    except OSError:
+                        shutil.copy2(entry.target, entry.backup)
+                os.replace(entry.staged, entry.target)
+            for directory in {os.path.dirname(entry.target) for entry in self.entries}:
+                _fsync_path(directory, directory=True)
+            self._write_manifest('committed')
+        except BaseException:
+            self.rollback()
+            raise
+        self.state = 'committed'
+        _cleanup(self.entries)
+        self._clear_manifest()
+        return len(self.entries)
+
+    def rollback(self):
+        _restore(self.entries)
+        self._clear_manifest()
+        self.state = 'rolled back'
+
+
+def _restore(entries: list[StagedFile]):
+    for entry in entries:
+        if os.path.exists(entry.backup):
+            if os.path.exists(entry.target) and os.path.samefile(entry.backup, entry.target):
+                # Not swapped yet: the backup is a hard link to the original, and rename() between
+                # two links of one file is a no-op on POSIX, so drop the link instead.
+                os.unlink(entry.backup)
+            else:
+                os.replace(entry.backup, entry.target)
+        elif not entry.existed and not os.path.exists(entry.staged) and os.path.exists(entry.target):
+            os.unlink(entry.target)
+        if os.path.exists(entry.staged):
+            os.unlink(entry.staged)
+
+
+def _cleanup(entries: list[StagedFile]):
+    for entry in entries:
+        for leftover in (entry.backup, entry.staged):
+            try:
+                os.unlink(leftover)
+            except FileNotFoundError:
+                pass
+
+
+def recover(journal_dir: Path) -> tuple[str, int] | None:
+    """Finish what a crashed run left behind: its transaction, then files it staged but never used."""
+    journal_dir = Path(journal_dir)
+    recovered = _recover_manifest(journal_dir / MANIFEST_NAME)
+    discarded = sum(discard_staged(log) for log in sorted((journal_dir / STAGING_DIR).glob('*.log')))
+    if recovered is None and discarded:
+        return 'discarded', discarded
+    return recovered
+
+
+def _recover_manifest(manifest: Path) -> tuple[str, int] | None:
+    try:
+        recorded = json.loads(manifest.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return None
+    except ValueError as error:
+        raise TransactionError(f'unreadable transaction manifest {manifest}: {error}') from None
+    entries = [StagedFile(**entry) for entry in recorded['entries']]
+    if recorded['state'] == 'committed':
+        _cleanup(entries)
+        action = 'completed'
+    else:
+        _restore(entries)
+        action = 'rolled back'
+    manifest.unlink()
+    return action, len(entries)